@@ -8,15 +8,16 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import sys
+import pickle
+import xxhash
 from pathlib import Path
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent.parent / 'src'))
 
 from config import *
+from data_generator import load_data_file
 from hybrid_recommender import HybridRecommender
 from collaborative_filtering import CollaborativeFilteringRecommender
 from content_based_filtering import ContentBasedRecommender
@@ -32,7 +33,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -197,19 +198,97 @@ st.markdown("""
         display: inline-block;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Badge colors for the sidebar profile cards
+DIET_BADGE = {'non_veg': 'badge-red', 'vegan': 'badge-blue', 'veg': 'badge-green'}
+BUDGET_BADGE = {'high': 'badge-green', 'low': 'badge-red'}  # high sensitivity = low spend
+NEW_USER_DIET_BADGE = {'Non Veg': 'badge-red', 'Vegan': 'badge-blue', 'Veg': 'badge-green'}
+NEW_USER_BUDGET_BADGE = {'₹0-200': 'badge-green', '₹200-400': 'badge-blue', '₹400-600': 'badge-orange'}
+
+@st.cache_data(show_spinner=False)
+def _inject_css():
+    """Custom CSS string (cached so the identical payload is reused across reruns)"""
+    return CUSTOM_CSS
+
+st.markdown(_inject_css(), unsafe_allow_html=True)
+
+CATEGORICAL_COLUMNS = ['cuisine_type', 'dietary_preference', 'price_sensitivity', 'price_range']
+
+@st.cache_data
+def _load_core_frames():
+    """Load the feature tables the models and landing page need (cached, shared across sessions)"""
+    
+    restaurant_features = load_data_file(PROCESSED_DATA_DIR / 'restaurant_features.csv')
+    user_features = load_data_file(PROCESSED_DATA_DIR / 'user_features.csv')
+    
+    # Low-cardinality columns as Categorical (int codes instead of Python strings)
+    for df in (restaurant_features, user_features):
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+    
+    return {
+        'restaurant_features': restaurant_features,
+        'user_features': user_features
+    }
+
+@st.cache_data
+def _load_orders():
+    """Load the raw orders (cached; only read once a view needs order rows)"""
+    # Parquet keeps order_timestamp as datetime64, so no to_datetime pass is needed
+    return load_data_file(SYNTHETIC_DATA_DIR / 'orders.csv', parse_dates=['order_timestamp'])
+
+@st.cache_data
+def _compute_stats(_restaurant_features, _user_features):
+    """Dataset statistics for the landing page (cached)"""
+    n_users = len(_user_features)
+    n_restaurants = len(_restaurant_features)
+    # Every order belongs to a user, so the per-user counts add up to the order total
+    n_orders = int(_user_features['order_count'].sum())
+    
+    return {
+        'n_users': n_users,
+        'n_restaurants': n_restaurants,
+        'n_orders': n_orders,
+        'avg_orders': float(_user_features['total_orders'].mean()),
+        'n_cuisines': int(_restaurant_features['cuisine_type'].nunique()),
+        'sparsity': (1 - n_orders / (n_users * n_restaurants)) * 100
+    }
 
 @st.cache_resource
-def load_models_and_data():
-    """Load all models and data (cached)"""
+def _build_lookups(_restaurant_features, _user_features):
+    """Build O(1) lookup tables for the sidebar (cached)"""
+    return {
+        'restaurant_names': dict(zip(
+            _restaurant_features['restaurant_id'].to_numpy(),
+            _restaurant_features['name'].to_numpy()
+        )),
+        'user_profiles': _user_features.set_index('user_id', drop=False),
+        'user_list': _user_features['user_id'].tolist()
+    }
+
+@st.cache_resource
+def _build_order_lookups():
+    """Orders newest first with each user's row positions (cached, loads orders on first use)"""
+    
+    # Newest orders first, so each user's row positions are already in recency order
+    orders_by_recency = _load_orders().sort_values('order_timestamp', ascending=False)
     
-    # Load data
-    restaurant_features = pd.read_csv(PROCESSED_DATA_DIR / 'restaurant_features.csv')
-    user_features = pd.read_csv(PROCESSED_DATA_DIR / 'user_features.csv')
-    interaction_matrix = pd.read_csv(PROCESSED_DATA_DIR / 'interaction_matrix.csv', index_col=0)
-    orders_df = pd.read_csv(SYNTHETIC_DATA_DIR / 'orders.csv')
+    return {
+        'orders_by_recency': orders_by_recency,
+        'user_order_idx': orders_by_recency.groupby('user_id', sort=False).indices
+    }
 
-    orders_df['order_timestamp'] = pd.to_datetime(orders_df['order_timestamp'])
+@st.cache_resource
+def _load_models(_restaurant_features, _user_features):
+    """Load all models (cached)
+    
+    Arguments are underscore-prefixed so Streamlit does not hash the DataFrames
+    """
+    
+    restaurant_features = _restaurant_features
+    user_features = _user_features
     
     # Load models
     cf_model = CollaborativeFilteringRecommender.load_model()
@@ -230,14 +309,25 @@ def load_models_and_data():
         'cf_model': cf_model,
         'cb_model': cb_model,
         'cold_start': cold_start,
-        'explainer': explainer,
-        'restaurant_features': restaurant_features,
-        'user_features': user_features,
-        'orders_df': orders_df
+        'explainer': explainer
     }
 
-def display_restaurant_card(restaurant, rank, explanation=None):
-    """Display a restaurant recommendation card"""
+def load_models_and_data():
+    """Load all models and data (orders are loaded separately, on demand)"""
+    frames = _load_core_frames()
+    models = _load_models(**{f"_{k}": v for k, v in frames.items()})
+    lookups = _build_lookups(frames['restaurant_features'], frames['user_features'])
+    
+    return {
+        **models,
+        **lookups,
+        'restaurant_features': frames['restaurant_features'],
+        'user_features': frames['user_features'],
+        'stats': _compute_stats(frames['restaurant_features'], frames['user_features'])
+    }
+
+def restaurant_card_html(restaurant, rank, explanation=None):
+    """Build the HTML for a restaurant recommendation card"""
     
     # FORMAT PRICE AS AMOUNT (e.g., ₹350)
     price_display = f"₹{int(restaurant['avg_order_value'])}"
@@ -245,32 +335,108 @@ def display_restaurant_card(restaurant, rank, explanation=None):
     # Star rating
     stars = '⭐' * int(restaurant['avg_rating'])
     
-    st.markdown(f"""
-    <div class="restaurant-card">
-        <h3>#{rank} {restaurant['name']}</h3>
-        <p style="color: #666; font-size: 0.9rem;">
-            {restaurant['cuisine_type']} • <strong>{price_display}</strong> • {stars} {restaurant['avg_rating']}/5
-        </p>
-        <p style="margin: 0.5rem 0;">
-            🚚 Delivers in ~{restaurant['avg_delivery_time']} min
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # Show explanation if provided
+    # Explanation as a native <details> collapsible (no extra widgets)
+    explanation_html = ""
     if explanation:
-        with st.expander("💡 Why this recommendation?"):
-            st.markdown(f"""
-            <div class="explanation-box">
-                <strong>Primary Reason:</strong><br/>
-                {explanation['primary_reason']}
-            </div>
-            """, unsafe_allow_html=True)
-            
-            if explanation['supporting_reasons']:
-                st.markdown("**Additional Reasons:**")
-                for reason in explanation['supporting_reasons']:
-                    st.markdown(f"• {reason}")
+        reasons_html = "".join(
+            f'<p style="margin: 0.25rem 0;">• {reason}</p>'
+            for reason in explanation['supporting_reasons']
+        )
+        if reasons_html:
+            reasons_html = f'<p style="margin: 0.5rem 0 0.25rem;"><strong>Additional Reasons:</strong></p>{reasons_html}'
+        
+        explanation_html = (
+            '<details><summary>💡 Why this recommendation?</summary>'
+            f'<div class="explanation-box"><strong>Primary Reason:</strong><br/>{explanation["primary_reason"]}</div>'
+            f'{reasons_html}</details>'
+        )
+    
+    # Kept on unindented, non-blank lines so markdown treats it as one HTML block
+    return (
+        '<div class="restaurant-card">'
+        f'<h3>#{rank} {restaurant["name"]}</h3>'
+        '<p style="color: #666; font-size: 0.9rem;">'
+        f'{restaurant["cuisine_type"]} • <strong>{price_display}</strong> • {stars} {restaurant["avg_rating"]:.1f}/5'
+        '</p>'
+        f'<p style="margin: 0.5rem 0;">🚚 Delivers in ~{restaurant["avg_delivery_time"]} min</p>'
+        f'{explanation_html}'
+        '</div>'
+    )
+
+# Plotly is imported inside the figure builders so the landing page never loads it
+@st.cache_data(show_spinner=False)
+def _build_cuisine_fig(cuisine_names, cuisine_counts):
+    """Cuisine distribution pie chart (cached)"""
+    import plotly.express as px
+    
+    fig = px.pie(
+        values=list(cuisine_counts),
+        names=list(cuisine_names),
+        title="Cuisine Diversity in Recommendations",
+        color_discrete_sequence=px.colors.qualitative.Set3
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+def _fast_df_hash(df):
+    """Hash a DataFrame with xxhash (much faster than Streamlit's default md5)"""
+    return xxhash.xxh3_64(pickle.dumps(df, protocol=5)).intdigest()
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _fast_df_hash})
+def _build_scatter_fig(recommendations):
+    """Rating vs price scatter plot (cached)"""
+    import plotly.express as px
+    
+    return px.scatter(
+        recommendations,
+        x='price_range',
+        y='avg_rating',
+        size='avg_delivery_time',
+        color='cuisine_type',
+        hover_data=['name'],
+        title="Restaurant Rating vs Price Range",
+        labels={'price_range': 'Price Range (₹)', 'avg_rating': 'Rating (⭐)'}
+    )
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: _fast_df_hash})
+def _build_scores_fig(recommendations):
+    """Model component scores bar chart for the top 10 (cached)"""
+    import plotly.graph_objects as go
+    
+    top_10 = recommendations.head(10)
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        name='Collaborative Filtering',
+        x=top_10['name'],
+        y=top_10['cf_score'],
+        marker_color='#E23744'
+    ))
+    
+    fig.add_trace(go.Bar(
+        name='Content-Based',
+        x=top_10['name'],
+        y=top_10['content_score'],
+        marker_color='#FFC043'
+    ))
+    
+    fig.add_trace(go.Bar(
+        name='Contextual',
+        x=top_10['name'],
+        y=top_10['contextual_score'],
+        marker_color='#48C479'
+    ))
+    
+    fig.update_layout(
+        title="Model Component Scores (Top 10)",
+        xaxis_title="Restaurant",
+        yaxis_title="Score",
+        barmode='group',
+        height=500
+    )
+    
+    return fig
 
 def main():
     # Load models and data
@@ -280,9 +446,10 @@ def main():
     hybrid_model = models_data['hybrid_model']
     cold_start = models_data['cold_start']
     explainer = models_data['explainer']
-    restaurant_features = models_data['restaurant_features']
-    user_features = models_data['user_features']
-    orders_df = models_data['orders_df']
+    stats = models_data['stats']
+    restaurant_names = models_data['restaurant_names']
+    user_profiles = models_data['user_profiles']
+    user_list = models_data['user_list']
     
     # Header
     st.markdown('<h1 class="main-header">🍽️ ML-Powered Restaurant Recommendations</h1>', unsafe_allow_html=True)
@@ -306,7 +473,6 @@ def main():
         
         if user_type == "Existing User":
             # Select existing user
-            user_list = user_features['user_id'].tolist()
             st.markdown("---")
             selected_user = st.selectbox(
                 "Select User:",
@@ -315,24 +481,13 @@ def main():
             )
             
             # --- User Profile Card ---
-            user_profile = user_features[user_features['user_id'] == selected_user].iloc[0]
+            user_profile = user_profiles.loc[selected_user]
             
             st.markdown('<div class="sidebar-header">👤 User Profile</div>', unsafe_allow_html=True)
             
-            # Determine badge color for diet
-            if user_profile['dietary_preference'] == 'non_veg':
-                diet_color = "badge-red"
-            elif user_profile['dietary_preference'] == 'vegan':
-                diet_color = "badge-blue"
-            elif user_profile['dietary_preference'] == 'veg':
-                diet_color = "badge-green"
-            else:
-                diet_color = "badge-orange"
-
-            # Determine badge color for budget
-            budget_color = "badge-blue"
-            if user_profile['price_sensitivity'] == 'high': budget_color = "badge-green" # Low spend
-            elif user_profile['price_sensitivity'] == 'low': budget_color = "badge-red" # High spend
+            # Determine badge colors for diet and budget
+            diet_color = DIET_BADGE.get(user_profile['dietary_preference'], 'badge-orange')
+            budget_color = BUDGET_BADGE.get(user_profile['price_sensitivity'], 'badge-blue')
 
             st.markdown(f"""
             <div class="profile-card">
@@ -356,20 +511,19 @@ def main():
             """, unsafe_allow_html=True)
             
             # --- Compact Recent Orders ---
-            user_orders = orders_df[orders_df['user_id'] == selected_user]
-            if len(user_orders) > 0:
+            order_lookups = _build_order_lookups()
+            orders_by_recency = order_lookups['orders_by_recency']
+            order_idx = order_lookups['user_order_idx'].get(selected_user, np.empty(0, dtype=np.int64))
+            if len(order_idx) > 0:
                 st.markdown('<div class="sidebar-header">📜 Recent Orders</div>', unsafe_allow_html=True)
                 
-                recent_orders = user_orders.nlargest(5, 'order_timestamp')
+                recent_restaurant_ids = orders_by_recency['restaurant_id'].iloc[order_idx[:5]].to_numpy()
                 
                 # Create a mini-list look
-                orders_html = ""
-                for _, order in recent_orders.iterrows():
-                    restaurant_name = restaurant_features[
-                        restaurant_features['restaurant_id'] == order['restaurant_id']
-                    ]['name'].values[0]
-                    
-                    orders_html += f'<div style="margin-bottom: 6px; font-size: 0.9rem; display: flex; align-items: center;"><span style="color: #E23744; margin-right: 8px;">●</span><span style="color: #CCC;">{restaurant_name}</span></div>'
+                order_template = '<div style="margin-bottom: 6px; font-size: 0.9rem; display: flex; align-items: center;"><span style="color: #E23744; margin-right: 8px;">●</span><span style="color: #CCC;">{}</span></div>'
+                orders_html = "".join(
+                    order_template.format(restaurant_names[rid]) for rid in recent_restaurant_ids
+                )
                 
                 st.markdown(f"""
                 <div style="background-color: #1E1E1E; padding: 10px; border-radius: 8px; border: 1px solid #333;">
@@ -403,18 +557,12 @@ def main():
                 'favorite_cuisines': favorite_cuisines[:3],
                 'budget': budget
             }
+            favorite_set = frozenset(cold_start_prefs['favorite_cuisines'])
 
             # --- Live Profile Summary Card ---
             # Color logic for New Users
-            if dietary_pref == 'Non Veg': diet_color = "badge-red"
-            elif dietary_pref == 'Vegan': diet_color = "badge-blue"
-            elif dietary_pref == 'Veg': diet_color = "badge-green"
-            else: diet_color = "badge-orange"
-
-            if budget == '₹0-200': budget_color = "badge-green"
-            elif budget == '₹200-400': budget_color = "badge-blue"
-            elif budget == '₹400-600': budget_color = "badge-orange"
-            else: budget_color = "badge-red"
+            diet_color = NEW_USER_DIET_BADGE.get(dietary_pref, 'badge-orange')
+            budget_color = NEW_USER_BUDGET_BADGE.get(budget, 'badge-red')
 
             cuisines_text = ", ".join(favorite_cuisines[:3]) if favorite_cuisines else "None"
 
@@ -523,28 +671,30 @@ def main():
                 )
                 
                 # --- GENERATE SIMPLE EXPLANATIONS FOR NEW USERS ---
-                explanations = []
-                for _, row in recommendations.iterrows():
-                    # Check if cuisine matches their selection
-                    if row['cuisine_type'] in cold_start_prefs['favorite_cuisines']:
-                        primary = f"Matches your preference for {row['cuisine_type']}"
-                    else:
-                        primary = "Highly recommended for new users"
-                    
-                    # Create supporting reasons
-                    reasons = []
-                    if row['avg_rating'] >= 4.5:
-                        reasons.append(f"Top-rated restaurant ({row['avg_rating']}⭐)")
-                    
-                    if row['avg_delivery_time'] < 30:
-                        reasons.append(f"Fast delivery (~{int(row['avg_delivery_time'])} min)")
-                        
-                    reasons.append(f"Fits your budget ({row['price_range']} range)")
-                    
-                    explanations.append({
-                        'primary_reason': primary,
-                        'supporting_reasons': reasons
-                    })
+                cuisines = recommendations['cuisine_type'].to_numpy()
+                ratings = recommendations['avg_rating'].to_numpy()
+                delivery_times = recommendations['avg_delivery_time'].to_numpy()
+                price_ranges = recommendations['price_range'].to_numpy()
+                
+                # Check if cuisine matches their selection
+                is_match = np.isin(cuisines, list(favorite_set))
+                is_top_rated = ratings >= 4.5
+                is_fast = delivery_times < 30
+                
+                explanations = [
+                    {
+                        'primary_reason': (
+                            f"Matches your preference for {cuisines[i]}" if is_match[i]
+                            else "Highly recommended for new users"
+                        ),
+                        'supporting_reasons': (
+                            ([f"Top-rated restaurant ({ratings[i]}⭐)"] if is_top_rated[i] else [])
+                            + ([f"Fast delivery (~{int(delivery_times[i])} min)"] if is_fast[i] else [])
+                            + [f"Fits your budget ({price_ranges[i]} range)"]
+                        )
+                    }
+                    for i in range(len(recommendations))
+                ]
         
         # Display results
         st.header("🎉 Your Personalized Recommendations")
@@ -553,62 +703,40 @@ def main():
             st.warning("No recommendations found. Try adjusting your preferences.")
             return
         
-        # Overview metrics
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            avg_rating = recommendations['avg_rating'].mean()
-            st.markdown(f"""
-            <div class="metric-card">
-                <h2>⭐ {avg_rating:.1f}</h2>
-                <p>Avg Rating</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            avg_delivery = recommendations['avg_delivery_time'].mean()
-            st.markdown(f"""
-            <div class="metric-card">
-                <h2>🚚 {avg_delivery:.0f} min</h2>
-                <p>Avg Delivery</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            unique_cuisines = recommendations['cuisine_type'].nunique()
-            st.markdown(f"""
-            <div class="metric-card">
-                <h2>🍜 {unique_cuisines}</h2>
-                <p>Cuisine Types</p>
-            </div>
-            """, unsafe_allow_html=True)
+        # Overview metrics (one aggregation pass, one HTML grid)
+        summary = recommendations.agg({
+            'avg_rating': 'mean',
+            'avg_delivery_time': 'mean',
+            'cuisine_type': 'nunique',
+            'avg_order_value': 'mean'
+        })
         
-        with col4:
-            # Change from price_range to avg_order_value
-            avg_cost = recommendations['avg_order_value'].mean()
-            
-            st.markdown(f"""
-            <div class="metric-card">
-                <h2>₹{int(avg_cost)}</h2>
-                <p>Avg Order Value</p>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(
+            '<div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">'
+            f'<div class="metric-card"><h2>⭐ {summary["avg_rating"]:.1f}</h2><p>Avg Rating</p></div>'
+            f'<div class="metric-card"><h2>🚚 {summary["avg_delivery_time"]:.0f} min</h2><p>Avg Delivery</p></div>'
+            f'<div class="metric-card"><h2>🍜 {int(summary["cuisine_type"])}</h2><p>Cuisine Types</p></div>'
+            f'<div class="metric-card"><h2>₹{int(summary["avg_order_value"])}</h2><p>Avg Order Value</p></div>'
+            '</div>',
+            unsafe_allow_html=True
+        )
         
         st.markdown("---")
         
         # Display recommendations
         st.subheader("📋 Top Recommendations")
         
-        # Create columns for the grid layout
-        cols = st.columns(2)
-
-        for idx, (_, restaurant) in enumerate(recommendations.iterrows()):
-            rank = idx + 1
-            explanation = explanations[idx] if explanations else None
-            
-            # Use modulo operator to switch between left (0) and right (1) columns
-            with cols[idx % 2]:
-                display_restaurant_card(restaurant, rank, explanation)
+        # Render all cards in a two-column CSS grid with a single markdown call
+        cards_html = "".join(
+            restaurant_card_html(
+                restaurant, idx + 1, explanations[idx] if explanations else None
+            )
+            for idx, (_, restaurant) in enumerate(recommendations.iterrows())
+        )
+        st.markdown(
+            f'<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 0 1rem;">{cards_html}</div>',
+            unsafe_allow_html=True
+        )
         
         # Visualizations
         st.markdown("---")
@@ -619,63 +747,19 @@ def main():
         with tab1:
             # Cuisine distribution
             cuisine_counts = recommendations['cuisine_type'].value_counts()
-            fig = px.pie(
-                values=cuisine_counts.values,
-                names=cuisine_counts.index,
-                title="Cuisine Diversity in Recommendations",
-                color_discrete_sequence=px.colors.qualitative.Set3
-            )
-            fig.update_traces(textposition='inside', textinfo='percent+label')
+            cuisine_counts = cuisine_counts[cuisine_counts > 0]  # Categoricals count unused categories
+            fig = _build_cuisine_fig(tuple(cuisine_counts.index), tuple(cuisine_counts.values))
             st.plotly_chart(fig, use_container_width=True)
         
         with tab2:
             # Rating vs Price scatter
-            fig = px.scatter(
-                recommendations,
-                x='price_range',
-                y='avg_rating',
-                size='avg_delivery_time',
-                color='cuisine_type',
-                hover_data=['name'],
-                title="Restaurant Rating vs Price Range",
-                labels={'price_range': 'Price Range (₹)', 'avg_rating': 'Rating (⭐)'}
-            )
+            fig = _build_scatter_fig(recommendations)
             st.plotly_chart(fig, use_container_width=True)
         
         with tab3:
             # Model scores
             if user_type == "Existing User" and 'cf_score' in recommendations.columns:
-                fig = go.Figure()
-                
-                fig.add_trace(go.Bar(
-                    name='Collaborative Filtering',
-                    x=recommendations['name'][:10],
-                    y=recommendations['cf_score'][:10],
-                    marker_color='#E23744'
-                ))
-                
-                fig.add_trace(go.Bar(
-                    name='Content-Based',
-                    x=recommendations['name'][:10],
-                    y=recommendations['content_score'][:10],
-                    marker_color='#FFC043'
-                ))
-                
-                fig.add_trace(go.Bar(
-                    name='Contextual',
-                    x=recommendations['name'][:10],
-                    y=recommendations['contextual_score'][:10],
-                    marker_color='#48C479'
-                ))
-                
-                fig.update_layout(
-                    title="Model Component Scores (Top 10)",
-                    xaxis_title="Restaurant",
-                    yaxis_title="Score",
-                    barmode='group',
-                    height=500
-                )
-                
+                fig = _build_scores_fig(recommendations)
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.info("Model component scores are only available for **existing users** with order history.")
@@ -728,29 +812,33 @@ def main():
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            st.metric("👥 Users", f"{len(user_features):,}")
-            st.metric("🍽️ Restaurants", f"{len(restaurant_features):,}")
+            st.metric("👥 Users", f"{stats['n_users']:,}")
+            st.metric("🍽️ Restaurants", f"{stats['n_restaurants']:,}")
         
         with col2:
-            st.metric("📦 Total Orders", f"{len(orders_df):,}")
-            avg_orders = user_features['total_orders'].mean()
-            st.metric("📈 Avg Orders/User", f"{avg_orders:.1f}")
+            st.metric("📦 Total Orders", f"{stats['n_orders']:,}")
+            st.metric("📈 Avg Orders/User", f"{stats['avg_orders']:.1f}")
         
         with col3:
-            sparsity = (1 - len(orders_df) / (len(user_features) * len(restaurant_features))) * 100
-            st.metric("🔍 Data Sparsity", f"{sparsity:.1f}%")
-            cuisines = restaurant_features['cuisine_type'].nunique()
-            st.metric("🍜 Cuisine Types", cuisines)
+            st.metric("🔍 Data Sparsity", f"{stats['sparsity']:.1f}%")
+            st.metric("🍜 Cuisine Types", stats['n_cuisines'])
 
-if __name__ == "__main__":
-    main()
-
-# --- FOOTER ---
-st.markdown("---")
-st.markdown("""
+@st.cache_data(ttl=60, show_spinner=False)
+def _footer_html():
+    """Footer HTML with a 'Last Updated' timestamp (cached for 60s)"""
+    return """
     <div style='text-align: center; color: #6b7280; padding: 20px;'>
         <p>🍽️ <strong>ML-Powered Restaurant Recommendations</strong> - Hybrid AI System • 40% Faster Decisions • Explainable</p>
         <p>Built with Python, Streamlit, Scikit-learn, Pandas, NumPy, SciPy & Plotly <strong>| Last Updated:</strong> {}</p>
         <p>© 2026 <strong>Ayush Saxena</strong>. All rights reserved.</p>
     </div>
-""".format(datetime.now().strftime("%d-%b-%Y At %I:%M %p")), unsafe_allow_html=True)
\ No newline at end of file
+""".format(datetime.now().strftime("%d-%b-%Y At %I:%M %p"))
+
+def render_footer():
+    """Display the page footer"""
+    st.markdown("---")
+    st.markdown(_footer_html(), unsafe_allow_html=True)
+
+if __name__ == "__main__":
+    main()
+    render_footer()
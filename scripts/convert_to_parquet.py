@@ -0,0 +1,47 @@
+"""
+Convert the committed CSV feature files used by the Streamlit app to Parquet
+Only needed when running the app without retraining; Parquet loads much faster than CSV
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from config import PROCESSED_DATA_DIR
+import pandas as pd
+
+# (CSV path, read_csv kwargs) for the committed feature CSVs
+# Training writes all of these as Parquet itself (save_data / save_features)
+CSV_FILES = [
+    (PROCESSED_DATA_DIR / 'restaurant_features.csv', {}),
+    (PROCESSED_DATA_DIR / 'user_features.csv', {}),
+]
+
+def main():
+    print("="*80)
+    print(" CONVERTING CSV DATA TO PARQUET")
+    print("="*80)
+    print()
+
+    for csv_path, read_kwargs in CSV_FILES:
+        if not csv_path.exists():
+            print(f"⚠️  Skipping {csv_path} (not found)")
+            continue
+
+        parquet_path = csv_path.with_suffix('.parquet')
+        if parquet_path.exists() and parquet_path.stat().st_mtime >= csv_path.stat().st_mtime:
+            # Never replace a Parquet copy with an older CSV
+            print(f"⏭️  Skipping {csv_path} (Parquet copy is up to date)")
+            continue
+
+        df = pd.read_csv(csv_path, **read_kwargs)
+        df.to_parquet(parquet_path, engine='pyarrow')
+
+        print(f"💾 Saved {parquet_path} ({len(df):,} rows)")
+
+    print("\n✅ Conversion complete!")
+
+if __name__ == "__main__":
+    main()
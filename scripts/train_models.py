@@ -8,11 +8,12 @@ from pathlib import Path
 # Add src to path
 sys.path.append(str(Path(__file__).parent.parent / 'src'))
 
-from data_generator import RestaurantDataGenerator
+from data_generator import RestaurantDataGenerator, load_data_file
 from feature_engineering import FeatureEngineer
 from collaborative_filtering import CollaborativeFilteringRecommender
 from content_based_filtering import ContentBasedRecommender
 from hybrid_recommender import HybridRecommender
+from config import SYNTHETIC_DATA_DIR, ensure_dirs
 import pandas as pd
 
 def main():
@@ -20,6 +21,8 @@ def main():
     print(" RESTAURANT RECOMMENDATION SYSTEM - MODEL TRAINING")
     print("="*80)
     print()
+
+    ensure_dirs()
     
     # Step 1: Generate synthetic data
     print("STEP 1: Generating Synthetic Data")
@@ -37,9 +40,9 @@ def main():
     print("\nSTEP 2: Feature Engineering")
     print("-" * 80)
     
-    users_df = pd.read_csv('data/synthetic/users.csv')
-    restaurants_df = pd.read_csv('data/synthetic/restaurants.csv')
-    orders_df = pd.read_csv('data/synthetic/orders.csv')
+    users_df = load_data_file(SYNTHETIC_DATA_DIR / 'users.csv')
+    restaurants_df = load_data_file(SYNTHETIC_DATA_DIR / 'restaurants.csv')
+    orders_df = load_data_file(SYNTHETIC_DATA_DIR / 'orders.csv')
     orders_df['order_timestamp'] = pd.to_datetime(orders_df['order_timestamp'])
     
     engineer = FeatureEngineer(users_df, restaurants_df, orders_df)
@@ -54,7 +57,7 @@ def main():
     print("\nSTEP 3: Training Collaborative Filtering Model")
     print("-" * 80)
     
-    cf_model = CollaborativeFilteringRecommender(interaction_matrix)
+    cf_model = CollaborativeFilteringRecommender.from_sparse(*interaction_matrix)
     cf_model.fit()
     cf_model.save_model()
     
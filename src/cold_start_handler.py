@@ -7,6 +7,27 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List
 from config import *
+from data_generator import load_data_file
+from feature_engineering import InteractionMatrix
+
+
+def _diversify(
+    cuisine_codes: np.ndarray, n_recommendations: int, cap: int = 3
+) -> np.ndarray:
+    """
+    Positions of the first n_recommendations items (in the given order)
+    keeping at most `cap` items per cuisine code
+    """
+    # Occurrence number of each item within its cuisine (0, 1, 2, ...)
+    order = np.argsort(cuisine_codes, kind="stable")
+    sorted_codes = cuisine_codes[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(order)])
+
+    occurrence = np.empty(len(order), dtype=np.intp)
+    occurrence[order] = np.arange(len(order)) - np.repeat(group_starts, group_sizes)
+
+    return np.flatnonzero(occurrence < cap)[:n_recommendations]
 
 
 class ColdStartHandler:
@@ -17,6 +38,19 @@ class ColdStartHandler:
     def __init__(self, restaurant_features: pd.DataFrame):
         self.restaurant_features = restaurant_features
 
+        # Integer cuisine codes so scoring and diversity never compare strings
+        self.cuisine_codes, cuisine_categories = pd.factorize(
+            restaurant_features["cuisine_type"], use_na_sentinel=False
+        )
+        self.cuisine_index = {
+            cuisine: code for code, cuisine in enumerate(cuisine_categories)
+        }
+
+        # Popularity ranking never changes, so sort once for popular_recommend
+        self.popular_restaurants = restaurant_features.sort_values(
+            by=["popularity_score", "avg_rating", "total_reviews"], ascending=False
+        )
+
     def onboarding_recommend(
         self, preferences: Dict, n_recommendations: int = 10
     ) -> pd.DataFrame:
@@ -34,14 +68,16 @@ class ColdStartHandler:
             DataFrame with restaurant recommendations
         """
 
-        candidates = self.restaurant_features.copy()
+        features = self.restaurant_features
 
         # === Apply Filters ===
+        # Combine both filters into one mask so the frame is sliced (copied) once
 
         # 1. Dietary filter
+        mask = np.ones(len(features), dtype=bool)
         dietary_pref = preferences.get("dietary_preference", "no_preference")
         if dietary_pref in ["veg", "vegan"]:
-            candidates = candidates[candidates["is_veg_only"] == True]
+            mask &= features["is_veg_only"].to_numpy() == True
 
         # 2. Budget filter
         budget = preferences.get("budget", "₹200-400")
@@ -52,59 +88,50 @@ class ColdStartHandler:
             "₹600+": [3, 4],
         }
         allowed_price_ranges = budget_map.get(budget, [1, 2])
-        candidates = candidates[candidates["price_range"].isin(allowed_price_ranges)]
+        mask &= np.isin(features["price_range"].to_numpy(), allowed_price_ranges)
 
-        # === Calculate Scores ===
+        candidates = features[mask].copy()
 
-        candidates["cold_start_score"] = 0.0
+        # === Calculate Scores ===
 
-        # 1. Cuisine match (50% weight)
+        # 1. Cuisine match (50% weight), split across favorite cuisines
         favorite_cuisines = preferences.get("favorite_cuisines", [])
-        if favorite_cuisines:
-            for cuisine in favorite_cuisines:
-                candidates.loc[
-                    candidates["cuisine_type"] == cuisine, "cold_start_score"
-                ] += 0.50 / len(favorite_cuisines)
-
-        # 2. Popularity (30% weight)
+        code_weights = np.zeros(len(self.cuisine_index))
+        for cuisine in favorite_cuisines:
+            if cuisine in self.cuisine_index:
+                code_weights[self.cuisine_index[cuisine]] += 0.50 / len(
+                    favorite_cuisines
+                )
+        candidate_codes = self.cuisine_codes[mask]
+        cuisine_score = code_weights[candidate_codes]
+
+        # 2. Popularity (30% weight) and 3. Rating (20% weight)
         max_popularity = candidates["popularity_score"].max() or 1
-        candidates["cold_start_score"] += 0.30 * (
-            candidates["popularity_score"] / max_popularity
+        candidates["cold_start_score"] = (
+            cuisine_score
+            + 0.30 * (candidates["popularity_score"].to_numpy() / max_popularity)
+            + 0.20 * (candidates["avg_rating"].to_numpy() / 5.0)
         )
 
-        # 3. Rating (20% weight)
-        candidates["cold_start_score"] += 0.20 * (candidates["avg_rating"] / 5.0)
-
         # === Ensure Diversity ===
-        # Don't show all restaurants from same cuisine
-        recommendations = []
-        cuisine_counts = {}
+        # Don't show all restaurants from same cuisine (max 3 per cuisine)
+        order = np.argsort(-candidates["cold_start_score"].to_numpy(), kind="stable")
+        sorted_candidates = candidates.iloc[order]
 
-        sorted_candidates = candidates.sort_values("cold_start_score", ascending=False)
-
-        for _, restaurant in sorted_candidates.iterrows():
-            cuisine = restaurant["cuisine_type"]
-
-            # Limit to max 3 restaurants per cuisine
-            if cuisine_counts.get(cuisine, 0) < 3:
-                recommendations.append(restaurant)
-                cuisine_counts[cuisine] = cuisine_counts.get(cuisine, 0) + 1
-
-            if len(recommendations) >= n_recommendations:
-                break
+        selected_positions = _diversify(
+            candidate_codes[order], n_recommendations, cap=3
+        )
 
         # If not enough diverse recommendations, add remaining top ones
-        if len(recommendations) < n_recommendations:
-            remaining = sorted_candidates.head(n_recommendations).to_dict("records")
-            for rest in remaining:
-                if len(recommendations) >= n_recommendations:
-                    break
-                if rest["restaurant_id"] not in [
-                    r["restaurant_id"] for r in recommendations
-                ]:
-                    recommendations.append(rest)
-
-        result = pd.DataFrame(recommendations)
+        if len(selected_positions) < n_recommendations:
+            top_positions = np.arange(min(n_recommendations, len(sorted_candidates)))
+            backfill = np.setdiff1d(
+                top_positions, selected_positions, assume_unique=True
+            )
+            selected_positions = np.r_[selected_positions, backfill][:n_recommendations]
+
+        # One positional slice keeps the column dtypes
+        result = sorted_candidates.iloc[selected_positions].copy()
 
         # Add rank
         result["rank"] = range(1, len(result) + 1)
@@ -130,14 +157,8 @@ class ColdStartHandler:
         Used when no preferences are provided
         """
 
-        # Sort by popularity and rating
-        popular = (
-            self.restaurant_features.sort_values(
-                by=["popularity_score", "avg_rating", "total_reviews"], ascending=False
-            )
-            .head(n_recommendations)
-            .copy()
-        )
+        # Already sorted by popularity and rating
+        popular = self.popular_restaurants.head(n_recommendations).copy()
 
         popular["rank"] = range(1, len(popular) + 1)
 
@@ -159,60 +180,76 @@ class ColdStartHandler:
         self,
         user_profile: Dict,
         all_users: pd.DataFrame,
-        interaction_matrix: pd.DataFrame,
+        interaction_matrix: InteractionMatrix,
         n_recommendations: int = 10,
     ) -> pd.DataFrame:
         """
         Find similar users based on profile and use their preferences
         (When user has profile but no orders yet)
+
+        Args:
+            interaction_matrix: Sparse user × restaurant scores with their ids,
+                as returned by FeatureEngineer.create_user_restaurant_matrix
         """
 
         # Find users with similar profile
-        similar_users = []
-
         favorite_cuisine = user_profile.get("favorite_cuisine")
         dietary_pref = user_profile.get("dietary_preference")
         price_sensitivity = user_profile.get("price_sensitivity")
 
-        for _, other_user in all_users.iterrows():
-            similarity_score = 0
-
-            # Cuisine match
-            if other_user["favorite_cuisine"] == favorite_cuisine:
-                similarity_score += 0.5
-
-            # Dietary match
-            if other_user["dietary_preference"] == dietary_pref:
-                similarity_score += 0.3
+        # Weighted sum of cuisine (0.5), dietary (0.3) and price sensitivity (0.2) matches
+        similarity_scores = (
+            0.5 * (all_users["favorite_cuisine"].to_numpy() == favorite_cuisine)
+            + 0.3 * (all_users["dietary_preference"].to_numpy() == dietary_pref)
+            + 0.2 * (all_users["price_sensitivity"].to_numpy() == price_sensitivity)
+        )
 
-            # Price sensitivity match
-            if other_user["price_sensitivity"] == price_sensitivity:
-                similarity_score += 0.2
+        # Keep users above the threshold, in table order
+        candidate_idx = np.flatnonzero(similarity_scores > 0.5)
 
-            if similarity_score > 0.5:  # Threshold
-                similar_users.append((other_user["user_id"], similarity_score))
+        user_ids = all_users["user_id"].to_numpy()
+        similar_users = list(
+            zip(user_ids[candidate_idx], similarity_scores[candidate_idx])
+        )
 
         if not similar_users:
             # Fallback to popular
             return self.popular_recommend(n_recommendations)
 
         # Get restaurants these similar users ordered from
-        restaurant_scores = {}
-
-        for similar_user_id, similarity in similar_users[:20]:  # Top 20 similar users
-            if similar_user_id in interaction_matrix.index:
-                user_restaurants = interaction_matrix.loc[similar_user_id]
-
-                for restaurant_id, score in user_restaurants.items():
-                    if score > 0:
-                        if restaurant_id not in restaurant_scores:
-                            restaurant_scores[restaurant_id] = 0
-                        restaurant_scores[restaurant_id] += score * similarity
+        # First 20 similar users' rows, weighted by similarity and summed per restaurant
+        matrix, matrix_user_ids, restaurant_ids = interaction_matrix
+        top_user_ids, top_similarities = zip(*similar_users[:20])
+        row_indices = pd.Index(matrix_user_ids).get_indexer(top_user_ids)
+        known = row_indices >= 0
+
+        # Slice the CSR rows and bincount their positive scores per restaurant
+        rows = matrix[row_indices[known]]
+        row_weights = np.repeat(
+            np.asarray(top_similarities)[known], np.diff(rows.indptr)
+        )
+        restaurant_scores = np.bincount(
+            rows.indices,
+            weights=np.maximum(rows.data, 0) * row_weights,
+            minlength=matrix.shape[1],
+        )
 
         # Sort and get top-N
-        top_restaurants = sorted(
-            restaurant_scores.items(), key=lambda x: x[1], reverse=True
-        )[:n_recommendations]
+        candidate_idx = np.flatnonzero(restaurant_scores > 0)
+        if n_recommendations < len(candidate_idx):
+            top = np.argpartition(
+                -restaurant_scores[candidate_idx], n_recommendations - 1
+            )[:n_recommendations]
+            candidate_idx = candidate_idx[top]
+        candidate_idx = candidate_idx[
+            np.argsort(-restaurant_scores[candidate_idx], kind="stable")
+        ]
+        top_restaurants = list(
+            zip(
+                restaurant_ids[candidate_idx],
+                restaurant_scores[candidate_idx],
+            )
+        )
 
         # Get restaurant details
         top_restaurant_ids = [rid for rid, _ in top_restaurants]
@@ -252,7 +289,7 @@ if __name__ == "__main__":
 
     # Load data
     print("📂 Loading data...")
-    restaurant_features = pd.read_csv(PROCESSED_DATA_DIR / "restaurant_features.csv")
+    restaurant_features = load_data_file(PROCESSED_DATA_DIR / "restaurant_features.csv")
 
     # Create handler
     handler = ColdStartHandler(restaurant_features)
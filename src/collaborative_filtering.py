@@ -6,12 +6,35 @@ OPTIMIZED: Computes similarity on-the-fly to prevent MemoryError
 
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from scipy.sparse import csr_matrix
+from sklearn.preprocessing import normalize
+from sklearn.decomposition import TruncatedSVD
+from scipy.sparse import csr_matrix, save_npz, load_npz
+from joblib import Parallel, delayed
+from pathlib import Path
 import pickle
+import json
 from typing import List, Dict, Tuple
 from config import *
 
+# Interaction scores are low-precision, so float32 halves memory traffic
+# without changing rankings
+INTERACTION_DTYPE = np.float32
+
+
+def _aggregate_scores(
+    sparse_matrix: csr_matrix, row_indices: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """
+    Similarity-weighted sum of the given CSR rows (one score per column)
+    """
+    rows = sparse_matrix[row_indices]
+    row_weights = np.repeat(weights, np.diff(rows.indptr))
+    return np.bincount(
+        rows.indices,
+        weights=rows.data * row_weights,
+        minlength=sparse_matrix.shape[1],
+    )
+
 
 class CollaborativeFilteringRecommender:
     """
@@ -19,14 +42,59 @@ class CollaborativeFilteringRecommender:
     Recommends restaurants based on similar users' preferences
     """
 
-    def __init__(self, interaction_matrix: pd.DataFrame):
+    def __init__(self, interaction_matrix: pd.DataFrame, n_factors: int = None):
         """
         Args:
             interaction_matrix: User-restaurant interaction scores (users × restaurants)
+            n_factors: If set, score with rank-n_factors TruncatedSVD latent factors
+                instead of exact neighbourhood aggregation (approximate, but the
+                per-query cost no longer depends on the number of interactions)
+        """
+        # Keep only a CSR matrix plus id lookups; the dense DataFrame is not stored
+        self._init_state(
+            csr_matrix(interaction_matrix.values, dtype=INTERACTION_DTYPE),
+            interaction_matrix.index.to_numpy(),
+            interaction_matrix.columns.to_numpy(),
+            n_factors,
+        )
+
+    @classmethod
+    def from_sparse(
+        cls,
+        sparse_interaction_matrix: csr_matrix,
+        user_ids: np.ndarray,
+        restaurant_ids: np.ndarray,
+        n_factors: int = None,
+    ):
+        """
+        Build a model from a CSR interaction matrix and its row/column ids
+        """
+        model = cls.__new__(cls)
+        model._init_state(
+            csr_matrix(sparse_interaction_matrix, dtype=INTERACTION_DTYPE),
+            user_ids,
+            restaurant_ids,
+            n_factors,
+        )
+        return model
+
+    def _init_state(
+        self, sparse_interaction_matrix, user_ids, restaurant_ids, n_factors
+    ):
+        """
+        Store the interaction matrix and the user/restaurant id lookups
         """
-        self.interaction_matrix = interaction_matrix
+        self.sparse_interaction_matrix = sparse_interaction_matrix
+        self.user_ids = np.asarray(user_ids, dtype=object)
+        self.restaurant_ids = np.asarray(restaurant_ids, dtype=object)
+        self.user_id_to_idx = {user_id: i for i, user_id in enumerate(self.user_ids)}
+        self.n_factors = n_factors
         # We NO LONGER store the full user_similarity_matrix to save RAM
-        self.sparse_interaction_matrix = None
+        self.normalized_interaction_matrix = None
+        # Latent factors (only when n_factors is set)
+        self.user_factors = None
+        self.normalized_user_factors = None
+        self.item_factors = None
         self.fitted = False
 
     def fit(self):
@@ -35,15 +103,37 @@ class CollaborativeFilteringRecommender:
         """
         print("🔧 Preparing sparse matrix for efficient similarity calculation...")
 
-        # Convert to sparse matrix for efficiency
-        # This uses very little memory compared to the dense matrix
-        self.sparse_interaction_matrix = csr_matrix(self.interaction_matrix.values)
+        # L2-normalize user rows once so cosine similarity is a plain sparse dot product
+        self.normalized_interaction_matrix = normalize(
+            self.sparse_interaction_matrix, axis=1
+        ).tocsr()
+
+        if self.n_factors is not None:
+            self._fit_latent_factors()
 
         self.fitted = True
         print(
             f"✅ Collaborative Filtering model fitted (Sparse Matrix Shape: {self.sparse_interaction_matrix.shape})"
         )
 
+    def _fit_latent_factors(self):
+        """
+        Factorize the interaction matrix into user (U) and item (VT) factors
+        """
+        n_components = min(self.n_factors, self.sparse_interaction_matrix.shape[1] - 1)
+        svd = TruncatedSVD(n_components=n_components, random_state=42)
+
+        self.user_factors = svd.fit_transform(self.sparse_interaction_matrix).astype(
+            np.float32
+        )
+        self.item_factors = svd.components_.astype(np.float32)
+        self.normalized_user_factors = normalize(self.user_factors, axis=1)
+
+        print(
+            f"✅ Fitted {n_components} latent factors "
+            f"(explained variance: {svd.explained_variance_ratio_.sum():.1%})"
+        )
+
     def get_similar_users(self, user_id: str, k: int = 10) -> List[Tuple[str, float]]:
         """
         Get top-k most similar users (Calculated On-The-Fly)
@@ -51,29 +141,39 @@ class CollaborativeFilteringRecommender:
         if not self.fitted:
             raise ValueError("Model not fitted. Call fit() first.")
 
-        if user_id not in self.interaction_matrix.index:
-            return []
-
         # Get the index of the target user
-        user_idx = self.interaction_matrix.index.get_loc(user_id)
-
-        # Get the target user's vector
-        user_vector = self.sparse_interaction_matrix[user_idx]
+        user_idx = self.user_id_to_idx.get(user_id)
+        if user_idx is None:
+            return []
 
-        # Calculate cosine similarity between this user and ALL other users
-        # This is fast! (Vector * Matrix multiplication)
-        similarities = cosine_similarity(
-            user_vector, self.sparse_interaction_matrix
-        ).flatten()
+        if self.user_factors is not None:
+            # Cosine similarity in latent space: a dense (n_users × k) GEMV
+            similarities = (
+                self.normalized_user_factors @ self.normalized_user_factors[user_idx]
+            ).astype(np.float64)
+        else:
+            # Get the target user's (normalized) vector
+            user_vector = self.normalized_interaction_matrix[user_idx]
+
+            # Calculate cosine similarity between this user and ALL other users
+            # Rows are pre-normalized, so this is a single sparse matrix-vector product
+            similarities = (
+                (self.normalized_interaction_matrix @ user_vector.T).toarray().ravel()
+            )
 
         # Get indices of top k similar users (excluding the user themselves)
         # We get k+1 because the user is most similar to themselves
-        similar_indices = similarities.argsort()[-(k + 1) :][::-1]
+        # Partial sort: select the top k+1 in O(N), then order only those
+        n_top = min(k + 1, len(similarities))
+        similar_indices = np.argpartition(similarities, -n_top)[-n_top:]
+        similar_indices = similar_indices[
+            np.argsort(-similarities[similar_indices], kind="stable")
+        ]
 
         similar_users = []
         for idx in similar_indices:
             if idx != user_idx:
-                similar_user_id = self.interaction_matrix.index[idx]
+                similar_user_id = self.user_ids[idx]
                 score = similarities[idx]
                 if score > 0:
                     similar_users.append((similar_user_id, score))
@@ -93,56 +193,60 @@ class CollaborativeFilteringRecommender:
             raise ValueError("Model not fitted. Call fit() first.")
 
         # Handle new users (cold start)
-        if user_id not in self.interaction_matrix.index:
+        user_idx = self.user_id_to_idx.get(user_id)
+        if user_idx is None:
             return pd.DataFrame(columns=["restaurant_id", "cf_score"])
 
-        # Get similar users (On-the-fly calculation)
-        similar_users = self.get_similar_users(user_id, k=30)
-
-        if not similar_users:
-            return pd.DataFrame(columns=["restaurant_id", "cf_score"])
-
-        # Get restaurants the target user has already interacted with
-        user_restaurants = self.interaction_matrix.loc[user_id]
-        already_ordered = user_restaurants[user_restaurants > 0].index.tolist()
-
-        # Aggregate scores from similar users
-        restaurant_scores = {}
-        total_similarity = sum(sim for _, sim in similar_users)
+        if self.user_factors is not None:
+            # Latent-factor scores: one k-dim dot product per restaurant
+            restaurant_scores = (
+                self.user_factors[user_idx] @ self.item_factors
+            ).astype(np.float64)
+        else:
+            # Get similar users (On-the-fly calculation)
+            similar_users = self.get_similar_users(user_id, k=30)
+
+            if not similar_users:
+                return pd.DataFrame(columns=["restaurant_id", "cf_score"])
+
+            # Aggregate scores from similar users' CSR rows
+            similarities = np.array([sim for _, sim in similar_users], dtype=np.float64)
+            similar_indices = np.array(
+                [self.user_id_to_idx[uid] for uid, _ in similar_users], dtype=np.intp
+            )
+            restaurant_scores = _aggregate_scores(
+                self.sparse_interaction_matrix, similar_indices, similarities
+            )
 
-        for similar_user_id, similarity in similar_users:
-            # Get this similar user's restaurant scores
-            similar_user_scores = self.interaction_matrix.loc[similar_user_id]
+            # Normalize by total similarity
+            total_similarity = similarities.sum()
+            if total_similarity > 0:
+                restaurant_scores = restaurant_scores / total_similarity
 
-            # Add weighted scores
-            for restaurant_id, score in similar_user_scores.items():
-                if score > 0:
-                    if restaurant_id not in restaurant_scores:
-                        restaurant_scores[restaurant_id] = 0
-                    restaurant_scores[restaurant_id] += score * similarity
-
-        # Normalize by total similarity
-        if total_similarity > 0:
-            restaurant_scores = {
-                rid: score / total_similarity
-                for rid, score in restaurant_scores.items()
-            }
+        # Only restaurants with a positive score are candidates
+        is_candidate = restaurant_scores > 0
 
         # Exclude already ordered restaurants if requested
         if exclude_already_ordered:
-            restaurant_scores = {
-                rid: score
-                for rid, score in restaurant_scores.items()
-                if rid not in already_ordered
+            user_row = self.sparse_interaction_matrix[user_idx]
+            is_candidate[user_row.indices[user_row.data > 0]] = False
+
+        # Top-N by score (partial sort, then order only the selected few)
+        candidate_indices = np.flatnonzero(is_candidate)
+        if n_recommendations < len(candidate_indices):
+            top = np.argpartition(
+                -restaurant_scores[candidate_indices], max(n_recommendations - 1, 0)
+            )[:n_recommendations]
+            candidate_indices = candidate_indices[top]
+        candidate_indices = candidate_indices[
+            np.argsort(-restaurant_scores[candidate_indices], kind="stable")
+        ]
+
+        recommendations = pd.DataFrame(
+            {
+                "restaurant_id": self.restaurant_ids[candidate_indices],
+                "cf_score": restaurant_scores[candidate_indices],
             }
-
-        # Convert to DataFrame and sort
-        recommendations = (
-            pd.DataFrame(
-                list(restaurant_scores.items()), columns=["restaurant_id", "cf_score"]
-            )
-            .sort_values("cf_score", ascending=False)
-            .head(n_recommendations)
         )
 
         # Normalize scores to 0-1 range
@@ -153,33 +257,59 @@ class CollaborativeFilteringRecommender:
 
         return recommendations.reset_index(drop=True)
 
+    def recommend_batch(
+        self,
+        user_ids: List[str],
+        n_recommendations: int = 10,
+        exclude_already_ordered: bool = True,
+        n_jobs: int = -1,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Generate recommendations for many users in parallel
+        Threads are enough: the sparse/dense products release the GIL
+        """
+        recommendations = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(self.recommend)(user_id, n_recommendations, exclude_already_ordered)
+            for user_id in user_ids
+        )
+        return dict(zip(user_ids, recommendations))
+
     def get_user_order_history(self, user_id: str) -> List[str]:
         """
         Get list of restaurants user has ordered from
         """
-        if user_id not in self.interaction_matrix.index:
+        user_idx = self.user_id_to_idx.get(user_id)
+        if user_idx is None:
             return []
 
-        user_restaurants = self.interaction_matrix.loc[user_id]
-        return user_restaurants[user_restaurants > 0].index.tolist()
+        user_row = self.sparse_interaction_matrix[user_idx]
+        return self.restaurant_ids[user_row.indices[user_row.data > 0]].tolist()
 
     def save_model(self, filepath: str = None):
         """
-        Save the fitted model (LIGHTWEIGHT VERSION)
+        Save the fitted model as .npz/.npy files in a directory (LIGHTWEIGHT VERSION)
         """
         if filepath is None:
-            filepath = MODELS_DIR / "collaborative_model.pkl"
+            filepath = MODELS_DIR / "collaborative_model"
+        filepath = Path(filepath)
+        filepath.mkdir(parents=True, exist_ok=True)
 
-        # Only save the interaction matrix and sparse matrix
+        # Only save the sparse matrix, its ids and the latent factors
         # NOT the huge similarity matrix
-        model_data = {
-            "interaction_matrix": self.interaction_matrix,
-            "sparse_interaction_matrix": self.sparse_interaction_matrix,
-            "fitted": self.fitted,
-        }
+        save_npz(filepath / "interactions.npz", self.sparse_interaction_matrix)
+        # Fixed-width string arrays load without pickle
+        np.save(filepath / "user_ids.npy", self.user_ids.astype(str))
+        np.save(filepath / "restaurant_ids.npy", self.restaurant_ids.astype(str))
+
+        for name in ("user_factors", "item_factors"):
+            factors = getattr(self, name)
+            if factors is not None:
+                np.save(filepath / f"{name}.npy", factors)
+            else:
+                (filepath / f"{name}.npy").unlink(missing_ok=True)
 
-        with open(filepath, "wb") as f:
-            pickle.dump(model_data, f)
+        with open(filepath / "meta.json", "w") as f:
+            json.dump({"n_factors": self.n_factors, "fitted": self.fitted}, f)
 
         print(f"💾 Saved collaborative filtering model to {filepath}")
 
@@ -189,21 +319,68 @@ class CollaborativeFilteringRecommender:
         Load a saved model
         """
         if filepath is None:
-            filepath = MODELS_DIR / "collaborative_model.pkl"
+            filepath = MODELS_DIR / "collaborative_model"
+            # Fall back to a model pickled by older versions
+            if not filepath.exists():
+                filepath = MODELS_DIR / "collaborative_model.pkl"
+        filepath = Path(filepath)
+
+        if filepath.suffix == ".pkl":
+            model = cls._load_pickle(filepath)
+        else:
+            with open(filepath / "meta.json") as f:
+                meta = json.load(f)
+
+            model = cls.from_sparse(
+                load_npz(filepath / "interactions.npz"),
+                np.load(filepath / "user_ids.npy"),
+                np.load(filepath / "restaurant_ids.npy"),
+                meta["n_factors"],
+            )
+            if (filepath / "user_factors.npy").exists():
+                model.user_factors = np.load(
+                    filepath / "user_factors.npy", mmap_mode="r"
+                )
+                model.item_factors = np.load(
+                    filepath / "item_factors.npy", mmap_mode="r"
+                )
+            model.fitted = meta["fitted"]
+
+        if model.user_factors is not None:
+            model.normalized_user_factors = normalize(model.user_factors, axis=1)
+
+        # The normalized matrix is cheap to rebuild, so it is not saved
+        if model.normalized_interaction_matrix is None and model.fitted:
+            model.normalized_interaction_matrix = normalize(
+                model.sparse_interaction_matrix, axis=1
+            ).tocsr()
 
+        print(f"✅ Loaded collaborative filtering model from {filepath}")
+        return model
+
+    @classmethod
+    def _load_pickle(cls, filepath: Path):
+        """
+        Load a model pickled by older versions
+        """
         with open(filepath, "rb") as f:
             model_data = pickle.load(f)
 
-        # Reconstruct model
-        model = cls(model_data["interaction_matrix"])
-        model.sparse_interaction_matrix = model_data.get("sparse_interaction_matrix")
-        model.fitted = model_data["fitted"]
-
-        # If loading an old model without sparse matrix, recreate it
-        if model.sparse_interaction_matrix is None and model.fitted:
-            model.sparse_interaction_matrix = csr_matrix(
-                model.interaction_matrix.values
+        # Oldest models stored the dense interaction matrix
+        if "interaction_matrix" in model_data:
+            model = cls(model_data["interaction_matrix"], model_data.get("n_factors"))
+        else:
+            model = cls.from_sparse(
+                model_data["sparse_interaction_matrix"],
+                model_data["user_ids"],
+                model_data["restaurant_ids"],
+                model_data.get("n_factors"),
             )
+        model.normalized_interaction_matrix = model_data.get(
+            "normalized_interaction_matrix"
+        )
+        model.user_factors = model_data.get("user_factors")
+        model.item_factors = model_data.get("item_factors")
+        model.fitted = model_data["fitted"]
 
-        print(f"✅ Loaded collaborative filtering model from {filepath}")
         return model
@@ -21,17 +21,23 @@ FIGURES_DIR = OUTPUT_DIR / "figures"
 REPORTS_DIR = OUTPUT_DIR / "reports"
 DASHBOARDS_DIR = OUTPUT_DIR / "dashboards"
 
-# Create directories
-for directory in [
-    RAW_DATA_DIR,
-    PROCESSED_DATA_DIR,
-    SYNTHETIC_DATA_DIR,
-    MODELS_DIR,
-    FIGURES_DIR,
-    REPORTS_DIR,
-    DASHBOARDS_DIR,
-]:
-    directory.mkdir(parents=True, exist_ok=True)
+
+def ensure_dirs():
+    """
+    Create the data, model and output directories
+    Called by the entry points that write files (not at import time)
+    """
+    for directory in [
+        RAW_DATA_DIR,
+        PROCESSED_DATA_DIR,
+        SYNTHETIC_DATA_DIR,
+        MODELS_DIR,
+        FIGURES_DIR,
+        REPORTS_DIR,
+        DASHBOARDS_DIR,
+    ]:
+        directory.mkdir(parents=True, exist_ok=True)
+
 
 # ===== BUSINESS CONTEXT =====
 # Focused scope: Home feed recommendations for repeat users
@@ -176,7 +182,7 @@ CONTEXT_FEATURES = {
 EXPLANATION_TEMPLATES = {
     "user_history": "You've ordered {cuisine} {count} times",
     "popular_choice": "Popular among users who like {cuisine}",
-    "highly_rated": "Rated {rating}/5 by {reviews} customers",
+    "highly_rated": "Rated {rating:.1f}/5 by {reviews} customers",
     "new_discovery": "New restaurant that matches your taste",
     "contextual": "Perfect for {meal_time}",
     "distance": "Only {distance} km away, delivers in {time} min",
@@ -258,10 +264,13 @@ OUT_OF_SCOPE = [
     "Restaurant onboarding flow",
 ]
 
-print("✅ Configuration loaded successfully")
-print(f"📁 Project Root: {PROJECT_ROOT}")
-print(f"🎯 Primary Metric: {PRIMARY_METRIC['name']}")
-print(f"📊 Target: {PRIMARY_METRIC['improvement']}% improvement")
-print(f"🍽️  Restaurants: {RESTAURANT_BASE}")
-print(f"👥 Users: {USER_BASE}")
-print(f"📦 Historical Orders: {HISTORICAL_ORDERS}")
+if __name__ == "__main__":
+    ensure_dirs()
+
+    print("✅ Configuration loaded successfully")
+    print(f"📁 Project Root: {PROJECT_ROOT}")
+    print(f"🎯 Primary Metric: {PRIMARY_METRIC['name']}")
+    print(f"📊 Target: {PRIMARY_METRIC['improvement']}% improvement")
+    print(f"🍽️  Restaurants: {RESTAURANT_BASE}")
+    print(f"👥 Users: {USER_BASE}")
+    print(f"📦 Historical Orders: {HISTORICAL_ORDERS}")
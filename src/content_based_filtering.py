@@ -5,11 +5,42 @@ Recommends restaurants based on restaurant attributes and user preferences
 
 import pandas as pd
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.preprocessing import StandardScaler
+import joblib
 import pickle
+from pathlib import Path
 from typing import Tuple, Dict, List
 from config import *
+from data_generator import load_data_file
+
+
+def _content_scores(
+    cuisine_codes: np.ndarray,
+    price_range: np.ndarray,
+    rating_score: np.ndarray,
+    delivery_score: np.ndarray,
+    favorite_code: int,
+    most_ordered_code: int,
+    price_preference: float,
+) -> np.ndarray:
+    """
+    Weighted content score of each restaurant for one user profile
+    """
+    # 1. Cuisine match (40% weight)
+    cuisine_score = np.where(
+        cuisine_codes == favorite_code,
+        0.40,
+        np.where(cuisine_codes == most_ordered_code, 0.30, 0.0),
+    )
+
+    # 2. Price match (25% weight)
+    price_diff = np.abs(price_range - price_preference)
+    price_score = np.maximum(0, 1 - (price_diff / 3))  # Normalize
+
+    # 3. Rating (20% weight) and 4. Delivery time (15% weight) are precomputed
+    return (
+        cuisine_score + 0.25 * price_score + 0.20 * rating_score + 0.15 * delivery_score
+    )
 
 
 class ContentBasedRecommender:
@@ -25,9 +56,57 @@ class ContentBasedRecommender:
         """
         self.restaurant_features = restaurant_features
         self.user_features = user_features
+        # Scaled feature vectors (float32, one row per restaurant) and id lookups
         self.restaurant_vectors = None
+        self.normalized_restaurant_vectors = None
+        self.restaurant_ids = None
+        self.restaurant_id_to_idx = None
         self.scaler = StandardScaler()
         self.fitted = False
+        if restaurant_features is not None:
+            self._prepare_scoring_arrays()
+        if user_features is not None:
+            self._index_user_profiles()
+
+    def _index_user_profiles(self):
+        """
+        Build a user_id -> profile lookup once (first row wins for duplicate ids)
+        """
+        profile_cols = [
+            col
+            for col in [
+                "user_id",
+                "favorite_cuisine",
+                "most_ordered_cuisine",
+                "dietary_preference",
+                "price_preference_score",
+            ]
+            if col in self.user_features.columns
+        ]
+        profiles = self.user_features[profile_cols].drop_duplicates("user_id")
+        self.user_profiles = {
+            profile.user_id: profile
+            for profile in profiles.itertuples(index=False, name="UserProfile")
+        }
+
+    def _prepare_scoring_arrays(self):
+        """
+        Extract the per-restaurant inputs of the content score once, as plain
+        arrays with integer cuisine codes, so recommend() does no DataFrame work
+        """
+        features = self.restaurant_features
+        cuisine_codes, cuisines = pd.factorize(features["cuisine_type"])
+        self.cuisine_to_code = {cuisine: code for code, cuisine in enumerate(cuisines)}
+        self.restaurant_cuisine_codes = cuisine_codes
+        self.restaurant_price_range = features["price_range"].to_numpy()
+        self.restaurant_rating_score = features["avg_rating"].to_numpy() / 5.0
+        # Lower delivery time is better
+        self.restaurant_delivery_score = np.clip(
+            1 - ((features["avg_delivery_time"].to_numpy() - 20) / 40), 0, 1
+        )
+        self.veg_restaurant_rows = np.flatnonzero(
+            (features["is_veg_only"] == True).to_numpy()
+        )
 
     def fit(self):
         """
@@ -53,19 +132,38 @@ class ContentBasedRecommender:
         # Fill any missing values
         restaurant_matrix = restaurant_matrix.fillna(0)
 
+        # Scale in float32 (StandardScaler keeps the input dtype), so the
+        # vectors are never materialized in float64
+        restaurant_matrix = restaurant_matrix.to_numpy(dtype=np.float32)
+
         # Standardize features
         restaurant_matrix_scaled = self.scaler.fit_transform(restaurant_matrix)
 
-        # Store as DataFrame for easier indexing
-        self.restaurant_vectors = pd.DataFrame(
-            restaurant_matrix_scaled,
-            index=self.restaurant_features["restaurant_id"],
-            columns=feature_cols,
+        self._set_vectors(
+            restaurant_matrix_scaled, self.restaurant_features["restaurant_id"]
         )
 
         self.fitted = True
         print(f"✅ Restaurant vectors created: {self.restaurant_vectors.shape}")
 
+    def _set_vectors(self, restaurant_vectors: np.ndarray, restaurant_ids):
+        """
+        Store the vectors as a contiguous float32 matrix with row-id lookups
+        and L2-normalize the rows once so cosine similarity is a plain dot product
+        """
+        self.restaurant_vectors = np.ascontiguousarray(
+            restaurant_vectors, dtype=np.float32
+        )
+        self.restaurant_ids = np.asarray(restaurant_ids, dtype=object)
+        self.restaurant_id_to_idx = {
+            restaurant_id: i for i, restaurant_id in enumerate(self.restaurant_ids)
+        }
+
+        norms = np.linalg.norm(self.restaurant_vectors, axis=1, keepdims=True)
+        self.normalized_restaurant_vectors = self.restaurant_vectors / np.where(
+            norms == 0, 1, norms
+        )
+
     def find_similar_restaurants(
         self, restaurant_id: str, k: int = 10
     ) -> List[Tuple[str, float]]:
@@ -82,31 +180,68 @@ class ContentBasedRecommender:
         if not self.fitted:
             raise ValueError("Model not fitted. Call fit() first.")
 
-        if restaurant_id not in self.restaurant_vectors.index:
+        target_idx = self.restaurant_id_to_idx.get(restaurant_id)
+        if target_idx is None:
             return []
 
-        # Get target restaurant vector
-        target_vector = self.restaurant_vectors.loc[restaurant_id].values.reshape(1, -1)
-
-        # Compute similarity with all restaurants
-        similarities = cosine_similarity(target_vector, self.restaurant_vectors.values)[
-            0
-        ]
-
-        # Create DataFrame for easier sorting
-        similarity_df = pd.DataFrame(
-            {"restaurant_id": self.restaurant_vectors.index, "similarity": similarities}
+        # Cosine similarity with all restaurants: one GEMV on the normalized rows
+        similarities = (
+            self.normalized_restaurant_vectors
+            @ self.normalized_restaurant_vectors[target_idx]
         )
 
         # Remove the target restaurant itself
-        similarity_df = similarity_df[similarity_df["restaurant_id"] != restaurant_id]
+        candidate_indices = np.flatnonzero(self.restaurant_ids != restaurant_id)
+
+        # Top-k by similarity (partial sort, then order only the selected few)
+        if k < len(candidate_indices):
+            top = np.argpartition(-similarities[candidate_indices], max(k - 1, 0))[:k]
+            candidate_indices = candidate_indices[top]
+        candidate_indices = candidate_indices[
+            np.argsort(-similarities[candidate_indices], kind="stable")
+        ]
 
-        # Sort and return top-k
-        top_k = similarity_df.sort_values("similarity", ascending=False).head(k)
         return [
-            (rid, sim) for rid, sim in zip(top_k["restaurant_id"], top_k["similarity"])
+            (self.restaurant_ids[i], float(similarities[i])) for i in candidate_indices
         ]
 
+    def find_similar_for_all(self, k: int = 10) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Find the top-k similar restaurants for every restaurant at once
+        (one GEMM for all pairwise similarities instead of N separate queries)
+
+        Returns:
+            Dict mapping restaurant_id to a list of (restaurant_id, similarity_score)
+        """
+        if not self.fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+
+        similarities = (
+            self.normalized_restaurant_vectors @ self.normalized_restaurant_vectors.T
+        )
+        # Exclude each restaurant from its own neighbours
+        np.fill_diagonal(similarities, -np.inf)
+
+        n_restaurants = len(self.restaurant_ids)
+        k = min(k, n_restaurants - 1)
+        if k <= 0:
+            return {rid: [] for rid in self.restaurant_ids}
+
+        # Top-k per row (partial sort, then order only the selected few)
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_similarities = np.take_along_axis(similarities, top, axis=1)
+        order = np.argsort(-top_similarities, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_similarities = np.take_along_axis(top_similarities, order, axis=1)
+
+        return {
+            self.restaurant_ids[i]: [
+                (self.restaurant_ids[j], float(sim))
+                for j, sim in zip(top[i], top_similarities[i])
+            ]
+            for i in range(n_restaurants)
+        }
+
     def recommend(
         self,
         user_id: str,
@@ -128,61 +263,45 @@ class ContentBasedRecommender:
             raise ValueError("Model not fitted. Call fit() first.")
 
         # Get user preferences
-        if user_id not in self.user_features["user_id"].values:
+        user_profile = self.user_profiles.get(user_id)
+        if user_profile is None:
             # Cold start: use popularity-based recommendations
             return self._cold_start_recommend(n_recommendations)
 
-        user_profile = self.user_features[
-            self.user_features["user_id"] == user_id
-        ].iloc[0]
-
-        # Start with all restaurants
-        candidates = self.restaurant_features.copy()
-
         # Apply hard filters based on user preferences
 
         # 1. Dietary filter
-        if user_profile["dietary_preference"] in ["veg", "vegan"]:
-            candidates = candidates[candidates["is_veg_only"] == True]
+        candidate_rows = None
+        if user_profile.dietary_preference in ["veg", "vegan"]:
+            candidate_rows = self.veg_restaurant_rows
 
         # If too few candidates after filtering, relax constraints
-        if len(candidates) < 20:
-            candidates = self.restaurant_features.copy()
-
-        # Calculate content-based scores
-        scores = []
-
-        for _, restaurant in candidates.iterrows():
-            score = 0.0
-
-            # 1. Cuisine match (40% weight)
-            if restaurant["cuisine_type"] == user_profile["favorite_cuisine"]:
-                score += 0.40
-            elif restaurant["cuisine_type"] == user_profile.get("most_ordered_cuisine"):
-                score += 0.30
-
-            # 2. Price match (25% weight)
-            price_diff = abs(
-                restaurant["price_range"] - user_profile["price_preference_score"]
-            )
-            price_score = max(0, 1 - (price_diff / 3))  # Normalize
-            score += 0.25 * price_score
-
-            # 3. Rating (20% weight)
-            rating_score = restaurant["avg_rating"] / 5.0
-            score += 0.20 * rating_score
-
-            # 4. Delivery time (15% weight)
-            # Lower is better
-            delivery_score = 1 - ((restaurant["avg_delivery_time"] - 20) / 40)
-            delivery_score = max(0, min(1, delivery_score))
-            score += 0.15 * delivery_score
-
-            scores.append(
-                {"restaurant_id": restaurant["restaurant_id"], "content_score": score}
-            )
+        if candidate_rows is None or len(candidate_rows) < 20:
+            candidate_rows = slice(None)
+
+        # Calculate content-based scores (vectorized over all candidates).
+        # Unknown cuisines get code -2, which matches no restaurant (missing
+        # restaurant cuisines are -1)
+        content_score = _content_scores(
+            self.restaurant_cuisine_codes[candidate_rows],
+            self.restaurant_price_range[candidate_rows],
+            self.restaurant_rating_score[candidate_rows],
+            self.restaurant_delivery_score[candidate_rows],
+            self.cuisine_to_code.get(user_profile.favorite_cuisine, -2),
+            self.cuisine_to_code.get(
+                getattr(user_profile, "most_ordered_cuisine", None), -2
+            ),
+            user_profile.price_preference_score,
+        )
 
-        recommendations = pd.DataFrame(scores)
+        recommendations = pd.DataFrame(
+            {
+                "restaurant_id": self.restaurant_features["restaurant_id"].to_numpy()[
+                    candidate_rows
+                ],
+                "content_score": content_score,
+            }
+        )
 
         # Exclude restaurants from order history if provided
         if user_order_history:
@@ -192,7 +311,7 @@ class ContentBasedRecommender:
 
         # Sort and return top-N
         recommendations = recommendations.sort_values(
-            "content_score", ascending=False
+            "content_score", ascending=False, kind="stable"
         ).head(n_recommendations)
 
         # Normalize scores to 0-1 range
@@ -204,15 +323,143 @@ class ContentBasedRecommender:
 
         return recommendations.reset_index(drop=True)
 
+    def recommend_many(
+        self,
+        user_ids: List[str],
+        n_recommendations: int = 10,
+        user_order_histories: Dict[str, List[str]] = None,
+        batch_size: int = 4096,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Generate recommendations for many users at once
+
+        Users and restaurants are encoded so that one matrix product gives
+        the same weighted content score as recommend() for every pair:
+        restaurants as one-hot cuisine and price level, users as the matching
+        cuisine weights and price scores per level. Rating and delivery time
+        do not depend on the user and are added as a per-restaurant bias.
+
+        Args:
+            user_ids: Target user IDs
+            n_recommendations: Number of recommendations per user
+            user_order_histories: Optional dict of user_id -> restaurant IDs to exclude
+            batch_size: Number of users scored per matrix product
+
+        Returns:
+            Dict mapping user_id to a DataFrame with restaurant_id and content_score
+        """
+        if not self.fitted:
+            raise ValueError("Model not fitted. Call fit() first.")
+
+        user_order_histories = user_order_histories or {}
+        features = self.restaurant_features
+        restaurant_ids = features["restaurant_id"].to_numpy()
+        n_restaurants = len(features)
+        rows = np.arange(n_restaurants)
+
+        # Restaurant side: one-hot cuisine | one-hot price level
+        cuisine_codes, cuisines = pd.factorize(features["cuisine_type"])
+        price_codes, price_levels = pd.factorize(features["price_range"])
+        n_cuisines = len(cuisines)
+        restaurant_matrix = np.zeros((n_restaurants, n_cuisines + len(price_levels)))
+        has_cuisine = cuisine_codes >= 0
+        restaurant_matrix[rows[has_cuisine], cuisine_codes[has_cuisine]] = 1.0
+        has_price = price_codes >= 0
+        restaurant_matrix[rows[has_price], n_cuisines + price_codes[has_price]] = 1.0
+
+        # 3. Rating (20% weight) and 4. Delivery time (15% weight)
+        rating_score = 0.20 * (features["avg_rating"].to_numpy() / 5.0)
+        delivery_score = 0.15 * np.clip(
+            1 - ((features["avg_delivery_time"].to_numpy() - 20) / 40), 0, 1
+        )
+
+        # Dietary filter, relaxed when too few veg restaurants (as in recommend)
+        veg_only = (features["is_veg_only"] == True).to_numpy()
+        apply_dietary_filter = veg_only.sum() >= 20
+        restaurant_index = pd.Index(restaurant_ids)
+
+        profiles = self.user_features.drop_duplicates("user_id").set_index("user_id")
+        known_ids = [user_id for user_id in user_ids if user_id in self.user_profiles]
+
+        recommendations = {}
+        for start in range(0, len(known_ids), batch_size):
+            batch_ids = known_ids[start : start + batch_size]
+            batch = profiles.loc[batch_ids]
+            batch_rows = np.arange(len(batch_ids))
+
+            # User side: 1. Cuisine match (40% favorite, 30% most ordered)
+            user_matrix = np.zeros((len(batch_ids), restaurant_matrix.shape[1]))
+            favorite_idx = cuisines.get_indexer(batch["favorite_cuisine"])
+            if "most_ordered_cuisine" in batch.columns:
+                most_ordered_idx = cuisines.get_indexer(batch["most_ordered_cuisine"])
+                use_most_ordered = (most_ordered_idx >= 0) & (
+                    most_ordered_idx != favorite_idx
+                )
+                user_matrix[
+                    batch_rows[use_most_ordered], most_ordered_idx[use_most_ordered]
+                ] = 0.30
+            use_favorite = favorite_idx >= 0
+            user_matrix[batch_rows[use_favorite], favorite_idx[use_favorite]] = 0.40
+
+            # 2. Price match (25% weight) for each price level
+            price_diff = np.abs(
+                batch["price_preference_score"].to_numpy()[:, None]
+                - price_levels.to_numpy()[None, :]
+            )
+            user_matrix[:, n_cuisines:] = 0.25 * np.maximum(0, 1 - (price_diff / 3))
+
+            # Added term by term, in the same order as recommend, so ties match
+            scores = user_matrix @ restaurant_matrix.T
+            scores += rating_score
+            scores += delivery_score
+
+            if apply_dietary_filter:
+                dietary_rows = batch["dietary_preference"].isin(["veg", "vegan"])
+                scores[np.ix_(dietary_rows.to_numpy(), ~veg_only)] = -np.inf
+
+            for i, user_id in enumerate(batch_ids):
+                history = user_order_histories.get(user_id)
+                if history:
+                    history_idx = restaurant_index.get_indexer(history)
+                    scores[i, history_idx[history_idx >= 0]] = -np.inf
+
+            # Top-N per user; a stable sort keeps catalog order among ties
+            k = max(min(n_recommendations, n_restaurants), 0)
+            top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+
+            for i, user_id in enumerate(batch_ids):
+                valid = np.isfinite(top_scores[i])
+                user_scores = top_scores[i][valid]
+                # Normalize scores to 0-1 range
+                if len(user_scores) > 0 and user_scores.max() > 0:
+                    user_scores = user_scores / user_scores.max()
+                recommendations[user_id] = pd.DataFrame(
+                    {
+                        "restaurant_id": restaurant_ids[top[i][valid]],
+                        "content_score": user_scores,
+                    }
+                )
+
+        # Cold start: use popularity-based recommendations
+        return {
+            user_id: (
+                recommendations[user_id]
+                if user_id in recommendations
+                else self._cold_start_recommend(n_recommendations)
+            )
+            for user_id in user_ids
+        }
+
     def _cold_start_recommend(self, n_recommendations: int) -> pd.DataFrame:
         """
         Fallback recommendations for new users
         Uses popularity and rating
         """
-        # Sort by popularity and rating
-        top_restaurants = self.restaurant_features.sort_values(
-            by=["popularity_score", "avg_rating"], ascending=False
-        ).head(n_recommendations)
+        # Top-N by popularity and rating (partial sort, not a full sort)
+        top_restaurants = self.restaurant_features.nlargest(
+            n_recommendations, ["popularity_score", "avg_rating"]
+        )
 
         recommendations = pd.DataFrame(
             {
@@ -227,19 +474,21 @@ class ContentBasedRecommender:
 
     def save_model(self, filepath: str = None):
         """
-        Save the fitted model
+        Save the fitted model as .npy arrays plus a small joblib file in a directory
         """
         if filepath is None:
-            filepath = MODELS_DIR / "content_based_model.pkl"
-
-        model_data = {
-            "restaurant_vectors": self.restaurant_vectors,
-            "scaler": self.scaler,
-            "fitted": self.fitted,
-        }
-
-        with open(filepath, "wb") as f:
-            pickle.dump(model_data, f)
+            filepath = MODELS_DIR / "content_based_model"
+        filepath = Path(filepath)
+        filepath.mkdir(parents=True, exist_ok=True)
+
+        # The vector matrix is memory-mapped on load; ids load without pickle
+        np.save(filepath / "restaurant_vectors.npy", self.restaurant_vectors)
+        np.save(filepath / "restaurant_ids.npy", self.restaurant_ids.astype(str))
+        joblib.dump(
+            {"scaler": self.scaler, "fitted": self.fitted},
+            filepath / "model.joblib",
+            compress=3,
+        )
 
         print(f"💾 Saved content-based model to {filepath}")
 
@@ -254,14 +503,32 @@ class ContentBasedRecommender:
         Load a saved model
         """
         if filepath is None:
-            filepath = MODELS_DIR / "content_based_model.pkl"
-
-        with open(filepath, "rb") as f:
-            model_data = pickle.load(f)
+            filepath = MODELS_DIR / "content_based_model"
+            # Fall back to a model pickled by older versions
+            if not filepath.exists():
+                filepath = MODELS_DIR / "content_based_model.pkl"
+        filepath = Path(filepath)
+
+        if filepath.suffix == ".pkl":
+            with open(filepath, "rb") as f:
+                model_data = pickle.load(f)
+            restaurant_vectors = model_data["restaurant_vectors"]
+            if isinstance(restaurant_vectors, pd.DataFrame):
+                # Older models stored the vectors as a DataFrame indexed by restaurant_id
+                restaurant_ids = restaurant_vectors.index
+                restaurant_vectors = restaurant_vectors.values
+            else:
+                restaurant_ids = model_data["restaurant_ids"]
+        else:
+            model_data = joblib.load(filepath / "model.joblib")
+            restaurant_vectors = np.load(
+                filepath / "restaurant_vectors.npy", mmap_mode="r"
+            )
+            restaurant_ids = np.load(filepath / "restaurant_ids.npy")
 
         # Reconstruct model
         model = cls(restaurant_features, user_features)
-        model.restaurant_vectors = model_data["restaurant_vectors"]
+        model._set_vectors(restaurant_vectors, restaurant_ids)
         model.scaler = model_data["scaler"]
         model.fitted = model_data["fitted"]
 
@@ -275,10 +542,12 @@ if __name__ == "__main__":
     print("=" * 80)
     print()
 
+    ensure_dirs()
+
     # Load features
     print("📂 Loading features...")
-    restaurant_features = pd.read_csv(PROCESSED_DATA_DIR / "restaurant_features.csv")
-    user_features = pd.read_csv(PROCESSED_DATA_DIR / "user_features.csv")
+    restaurant_features = load_data_file(PROCESSED_DATA_DIR / "restaurant_features.csv")
+    user_features = load_data_file(PROCESSED_DATA_DIR / "user_features.csv")
 
     # Train model
     print("\n🎯 Training content-based model...")
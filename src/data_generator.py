@@ -6,10 +6,26 @@ Creates realistic restaurant recommendation dataset
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Dict, List, Tuple
 from config import *
 
-np.random.seed(42)
+rng = np.random.default_rng(42)
+
+
+def load_data_file(csv_path: Path, **csv_kwargs) -> pd.DataFrame:
+    """
+    Load a data file from its Parquet copy if one exists, else from the CSV
+    Categorical columns are decoded to strings, as read_csv would return them
+    """
+    parquet_path = Path(csv_path).with_suffix(".parquet")
+    if not parquet_path.exists():
+        return pd.read_csv(csv_path, **csv_kwargs)
+
+    df = pd.read_parquet(parquet_path, engine="pyarrow")
+    for col in df.select_dtypes("category").columns:
+        df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
 
 
 class RestaurantDataGenerator:
@@ -56,62 +72,59 @@ class RestaurantDataGenerator:
             "Eatery",
         ]
 
+        prefix_idx = rng.integers(0, len(name_prefixes), RESTAURANT_BASE)
+        suffix_idx = rng.integers(0, len(name_suffixes), RESTAURANT_BASE)
         names = [
-            f"{np.random.choice(name_prefixes)} {np.random.choice(name_suffixes)}"
-            for _ in range(RESTAURANT_BASE)
+            f"{name_prefixes[p]} {name_suffixes[s]}"
+            for p, s in zip(prefix_idx, suffix_idx)
         ]
 
         # Cuisine distribution
-        cuisines = np.random.choice(
+        cuisines = rng.choice(
             CUISINE_TYPES,
             size=RESTAURANT_BASE,
             p=[0.20, 0.18, 0.15, 0.12, 0.08, 0.10, 0.05, 0.04, 0.03, 0.02, 0.02, 0.01],
         )
 
         # Ratings (skewed towards higher ratings)
-        ratings = np.random.beta(8, 2, RESTAURANT_BASE) * 2 + 3  # Range: 3-5
+        ratings = rng.beta(8, 2, RESTAURANT_BASE) * 2 + 3  # Range: 3-5
         ratings = np.clip(ratings, 3.0, 5.0)
 
         # Reviews count (log-normal distribution)
-        reviews = np.random.lognormal(mean=5, sigma=1.5, size=RESTAURANT_BASE).astype(
-            int
-        )
+        reviews = rng.lognormal(mean=5, sigma=1.5, size=RESTAURANT_BASE).astype(int)
         reviews = np.clip(reviews, 10, 10000)
 
         # Price range (1-4)
-        price_ranges = np.random.choice(
+        price_ranges = rng.choice(
             [1, 2, 3, 4], size=RESTAURANT_BASE, p=[0.15, 0.45, 0.30, 0.10]
         )
 
         # Delivery time (20-60 minutes)
-        delivery_times = np.random.normal(35, 10, RESTAURANT_BASE)
+        delivery_times = rng.normal(35, 10, RESTAURANT_BASE)
         delivery_times = np.clip(delivery_times, 20, 60).astype(int)
 
         # Veg/Non-veg
-        is_veg_only = np.random.choice(
-            [True, False], size=RESTAURANT_BASE, p=[0.30, 0.70]
-        )
+        is_veg_only = rng.choice([True, False], size=RESTAURANT_BASE, p=[0.30, 0.70])
 
         # Location (random coordinates in city grid)
         # Assume city bounds: lat 28.4-28.7, lon 77.0-77.3 (Delhi example)
-        locations_lat = np.random.uniform(28.4, 28.7, RESTAURANT_BASE)
-        locations_lon = np.random.uniform(77.0, 77.3, RESTAURANT_BASE)
+        locations_lat = rng.uniform(28.4, 28.7, RESTAURANT_BASE)
+        locations_lon = rng.uniform(77.0, 77.3, RESTAURANT_BASE)
 
         # Commission rate (platform's cut: 15-25%)
-        commission_rates = np.random.uniform(0.15, 0.25, RESTAURANT_BASE)
+        commission_rates = rng.uniform(0.15, 0.25, RESTAURANT_BASE)
 
         # Operating hours (simplified)
-        operating_hours = np.random.choice(
-            ["10AM-11PM", "11AM-12AM", "9AM-10PM", "24 hours"],
-            size=RESTAURANT_BASE,
-            p=[0.50, 0.30, 0.15, 0.05],
+        hour_options = ["10AM-11PM", "11AM-12AM", "9AM-10PM", "24 hours"]
+        operating_hours = rng.choice(
+            hour_options, size=RESTAURANT_BASE, p=[0.50, 0.30, 0.15, 0.05]
         )
 
         self.restaurants_df = pd.DataFrame(
             {
                 "restaurant_id": restaurant_ids,
                 "name": names,
-                "cuisine_type": cuisines,
+                "cuisine_type": pd.Categorical(cuisines, categories=CUISINE_TYPES),
                 "avg_rating": np.round(ratings, 1),
                 "total_reviews": reviews,
                 "price_range": price_ranges,
@@ -119,7 +132,9 @@ class RestaurantDataGenerator:
                 "is_veg_only": is_veg_only,
                 "location_lat": np.round(locations_lat, 4),
                 "location_lon": np.round(locations_lon, 4),
-                "operating_hours": operating_hours,
+                "operating_hours": pd.Categorical(
+                    operating_hours, categories=hour_options
+                ),
                 "commission_rate": np.round(commission_rates, 2),
             }
         )
@@ -137,49 +152,48 @@ class RestaurantDataGenerator:
 
         # Total orders per user (some power users, many casual users)
         # Log-normal distribution
-        total_orders = np.random.lognormal(mean=1.5, sigma=1.2, size=USER_BASE).astype(
-            int
-        )
+        total_orders = rng.lognormal(mean=1.5, sigma=1.2, size=USER_BASE).astype(int)
         total_orders = np.clip(total_orders, 1, 200)
 
         # Average order value
-        avg_order_values = np.random.gamma(shape=4, scale=100, size=USER_BASE)
+        avg_order_values = rng.gamma(shape=4, scale=100, size=USER_BASE)
         avg_order_values = np.clip(avg_order_values, 150, 1500)
 
         # Favorite cuisine (users have preferences)
-        favorite_cuisines = np.random.choice(CUISINE_TYPES, size=USER_BASE)
+        favorite_cuisines = rng.choice(CUISINE_TYPES, size=USER_BASE)
 
         # Price sensitivity
-        price_sensitivity = np.random.choice(
-            ["low", "medium", "high"], size=USER_BASE, p=[0.25, 0.50, 0.25]
+        sensitivity_levels = ["low", "medium", "high"]
+        price_sensitivity = rng.choice(
+            sensitivity_levels, size=USER_BASE, p=[0.25, 0.50, 0.25]
         )
 
         # Average rating given by user
-        avg_ratings_given = np.random.beta(7, 2, USER_BASE) * 2 + 3
+        avg_ratings_given = rng.beta(7, 2, USER_BASE) * 2 + 3
         avg_ratings_given = np.clip(avg_ratings_given, 3.0, 5.0)
 
         # Dietary preference
-        dietary_preferences = np.random.choice(
-            ["veg", "non_veg", "vegan", "no_preference"],
+        dietary_options = ["veg", "non_veg", "vegan", "no_preference"]
+        dietary_preferences = rng.choice(
+            dietary_options,
             size=USER_BASE,
             p=[0.30, 0.50, 0.05, 0.15],
         )
 
         # Preferred meal time
-        preferred_meal_times = np.random.choice(
-            ["breakfast", "lunch", "dinner", "snacks"],
+        meal_times = ["breakfast", "lunch", "dinner", "snacks"]
+        preferred_meal_times = rng.choice(
+            meal_times,
             size=USER_BASE,
             p=[0.10, 0.35, 0.45, 0.10],
         )
 
         # User location
-        locations_lat = np.random.uniform(28.4, 28.7, USER_BASE)
-        locations_lon = np.random.uniform(77.0, 77.3, USER_BASE)
+        locations_lat = rng.uniform(28.4, 28.7, USER_BASE)
+        locations_lon = rng.uniform(77.0, 77.3, USER_BASE)
 
         # Days since last order (recency)
-        days_since_last_order = np.random.exponential(scale=10, size=USER_BASE).astype(
-            int
-        )
+        days_since_last_order = rng.exponential(scale=10, size=USER_BASE).astype(int)
         days_since_last_order = np.clip(days_since_last_order, 0, 90)
 
         self.users_df = pd.DataFrame(
@@ -187,11 +201,19 @@ class RestaurantDataGenerator:
                 "user_id": user_ids,
                 "total_orders": total_orders,
                 "avg_order_value": np.round(avg_order_values, 2),
-                "favorite_cuisine": favorite_cuisines,
-                "price_sensitivity": price_sensitivity,
+                "favorite_cuisine": pd.Categorical(
+                    favorite_cuisines, categories=CUISINE_TYPES
+                ),
+                "price_sensitivity": pd.Categorical(
+                    price_sensitivity, categories=sensitivity_levels
+                ),
                 "avg_rating_given": np.round(avg_ratings_given, 1),
-                "dietary_preference": dietary_preferences,
-                "preferred_meal_time": preferred_meal_times,
+                "dietary_preference": pd.Categorical(
+                    dietary_preferences, categories=dietary_options
+                ),
+                "preferred_meal_time": pd.Categorical(
+                    preferred_meal_times, categories=meal_times
+                ),
                 "location_lat": np.round(locations_lat, 4),
                 "location_lon": np.round(locations_lon, 4),
                 "days_since_last_order": days_since_last_order,
@@ -210,168 +232,177 @@ class RestaurantDataGenerator:
 
         print(f"📦 Generating {HISTORICAL_ORDERS} orders...")
 
-        orders = []
-        order_id = 0
-
-        # Generate orders for each user based on their total_orders
-        for idx, user in self.users_df.iterrows():
-            user_id = user["user_id"]
-            n_orders = user["total_orders"]
-
-            # User preferences influence restaurant selection
-            favorite_cuisine = user["favorite_cuisine"]
-            dietary_pref = user["dietary_preference"]
-            price_sensitivity = user["price_sensitivity"]
-
-            # Filter restaurants based on preferences
-            candidate_restaurants = self.restaurants_df.copy()
-
-            # Dietary filtering
-            if dietary_pref == "veg":
-                candidate_restaurants = candidate_restaurants[
-                    candidate_restaurants["is_veg_only"] == True
-                ]
-            elif dietary_pref == "vegan":
-                candidate_restaurants = candidate_restaurants[
-                    (candidate_restaurants["is_veg_only"] == True)
-                    & (
-                        candidate_restaurants["cuisine_type"].isin(
-                            ["Healthy", "Salads"]
-                        )
-                    )
-                ]
-
-            # If too few candidates, relax constraints
-            if len(candidate_restaurants) < 10:
-                candidate_restaurants = self.restaurants_df.copy()
-
-            # Price filtering based on sensitivity
-            if price_sensitivity == "low":
-                # Low sensitivity = high budget, prefer expensive restaurants
-                candidate_restaurants = candidate_restaurants[
-                    candidate_restaurants["price_range"] >= 2
-                ]
-            elif price_sensitivity == "high":
-                # High sensitivity = low budget, prefer cheap restaurants
-                candidate_restaurants = candidate_restaurants[
-                    candidate_restaurants["price_range"] <= 2
-                ]
-
-            # Calculate probabilities for restaurant selection
-            # Higher weight for favorite cuisine
-            candidate_restaurants["selection_prob"] = 1.0
-            candidate_restaurants.loc[
-                candidate_restaurants["cuisine_type"] == favorite_cuisine,
-                "selection_prob",
-            ] *= 3.0  # 3x more likely to order favorite cuisine
-
-            # Higher rated restaurants more likely
-            candidate_restaurants["selection_prob"] *= (
-                candidate_restaurants["avg_rating"] / 5.0
+        users = self.users_df
+        order_counts = users["total_orders"].to_numpy()
+        n_total = int(order_counts.sum())
+
+        # Restaurant row of every order, filled one user slice at a time
+        order_rest_idx = np.empty(n_total, dtype=np.int32)
+
+        # Restaurant attributes as arrays, looked up by integer row
+        restaurants = self.restaurants_df.reset_index(drop=True)
+        restaurant_ids = restaurants["restaurant_id"].to_numpy()
+        price_range_arr = restaurants["price_range"].to_numpy()
+        delivery_arr = restaurants["avg_delivery_time"].to_numpy()
+        # Cuisines as integer codes, so the favorite-cuisine match is an int compare
+        cuisine_codes, cuisines = pd.factorize(restaurants["cuisine_type"])
+        cuisine_to_code = {cuisine: code for code, cuisine in enumerate(cuisines)}
+        rating_arr = restaurants["avg_rating"].to_numpy()
+
+        # Candidate restaurants per (dietary preference, price sensitivity),
+        # built once from cached masks instead of filtering per user
+        all_rows = np.ones(len(restaurants), dtype=bool)
+        is_veg = restaurants["is_veg_only"].to_numpy(dtype=bool)
+        dietary_masks = {
+            "veg": is_veg,
+            "vegan": is_veg
+            & restaurants["cuisine_type"].isin(["Healthy", "Salads"]).to_numpy(),
+        }
+        price_masks = {
+            # Low sensitivity = high budget, prefer expensive restaurants
+            "low": price_range_arr >= 2,
+            # High sensitivity = low budget, prefer cheap restaurants
+            "high": price_range_arr <= 2,
+        }
+        cohort_rows = {}
+        for cohort in set(
+            zip(
+                users["dietary_preference"].to_numpy(),
+                users["price_sensitivity"].to_numpy(),
             )
-
-            # Normalize probabilities
-            candidate_restaurants["selection_prob"] /= candidate_restaurants[
-                "selection_prob"
-            ].sum()
+        ):
+            dietary_pref, price_sensitivity = cohort
+            mask = dietary_masks.get(dietary_pref, all_rows)
+            # If too few candidates, relax constraints
+            if mask.sum() < 10:
+                mask = all_rows
+            mask = mask & price_masks.get(price_sensitivity, all_rows)
+            cohort_rows[cohort] = np.flatnonzero(mask)
+        selection_probs = {}
+
+        # Pick restaurants for each user's orders
+        order_start = 0
+        for n_orders, favorite_cuisine, dietary_pref, price_sensitivity in zip(
+            order_counts,
+            users["favorite_cuisine"].to_numpy(),
+            users["dietary_preference"].to_numpy(),
+            users["price_sensitivity"].to_numpy(),
+        ):
+            candidate_rows = cohort_rows[(dietary_pref, price_sensitivity)]
+
+            # Selection probabilities only depend on the cohort and the
+            # favorite cuisine, so compute them once per combination
+            prob_key = (dietary_pref, price_sensitivity, favorite_cuisine)
+            selection_prob = selection_probs.get(prob_key)
+            if selection_prob is None:
+                # Higher weight for favorite cuisine
+                selection_prob = np.ones(len(candidate_rows))
+                selection_prob[
+                    cuisine_codes[candidate_rows]
+                    == cuisine_to_code.get(favorite_cuisine, -2)
+                ] *= 3.0  # 3x more likely to order favorite cuisine
+
+                # Higher rated restaurants more likely
+                selection_prob *= rating_arr[candidate_rows] / 5.0
+
+                # Normalize probabilities
+                selection_prob /= selection_prob.sum()
+                selection_probs[prob_key] = selection_prob
 
             # Select restaurants for this user's orders
             # Users tend to repeat orders from liked restaurants
             unique_restaurants_count = max(
                 3, int(n_orders * 0.6)
             )  # 60% unique restaurants
-            selected_restaurants = np.random.choice(
-                candidate_restaurants["restaurant_id"].values,
-                size=min(unique_restaurants_count, len(candidate_restaurants)),
+            selected_restaurants = rng.choice(
+                candidate_rows,
+                size=min(unique_restaurants_count, len(candidate_rows)),
                 replace=False,
-                p=candidate_restaurants["selection_prob"].values,
+                p=selection_prob,
             )
 
-            # Generate orders with repetition
-            for _ in range(n_orders):
-                # 70% chance to repeat from selected restaurants
-                if np.random.random() < 0.70 and len(selected_restaurants) > 0:
-                    restaurant_id = np.random.choice(selected_restaurants)
-                else:
-                    # 30% chance to try new restaurant
-                    restaurant_id = np.random.choice(
-                        candidate_restaurants["restaurant_id"].values,
-                        p=candidate_restaurants["selection_prob"].values,
-                    )
-
-                # Order details
-                restaurant = self.restaurants_df[
-                    self.restaurants_df["restaurant_id"] == restaurant_id
-                ].iloc[0]
-
-                # Order value based on user's avg and restaurant's price range
-                base_value = user["avg_order_value"]
-                price_multiplier = restaurant["price_range"] / 2.0
-                order_value = (
-                    base_value * price_multiplier * np.random.uniform(0.8, 1.2)
-                )
-                order_value = np.round(order_value, 2)
-
-                # Order timestamp (random over past 6 months)
-                days_ago = np.random.randint(0, 180)
-                order_timestamp = datetime.now() - timedelta(days=days_ago)
-
-                # Delivery time (close to restaurant's avg)
-                delivery_time = restaurant["avg_delivery_time"] + np.random.randint(
-                    -5, 10
-                )
-                delivery_time = max(15, delivery_time)
-
-                # User rating (close to their avg)
-                rating = user["avg_rating_given"] + np.random.uniform(-0.5, 0.5)
-                rating = np.clip(rating, 1, 5)
-
-                orders.append(
-                    {
-                        "order_id": f"order_{order_id:08d}",
-                        "user_id": user_id,
-                        "restaurant_id": restaurant_id,
-                        "order_value": order_value,
-                        "order_timestamp": order_timestamp,
-                        "delivery_time": delivery_time,
-                        "user_rating": np.round(rating, 1),
-                        "cuisine_type": restaurant["cuisine_type"],
-                        "price_range": restaurant["price_range"],
-                    }
-                )
-
-                order_id += 1
-
-                if order_id % 25000 == 0:
-                    print(f"   Generated {order_id:,} orders...")
-
-        self.orders_df = pd.DataFrame(orders)
+            # Generate orders with repetition, all of the user's orders at once:
+            # 70% chance to repeat from selected restaurants,
+            # 30% chance to try new restaurant
+            repeat_mask = rng.random(n_orders) < 0.70
+            if len(selected_restaurants) == 0:
+                repeat_mask[:] = False
+            n_repeat = int(np.count_nonzero(repeat_mask))
+
+            # One bulk draw per path, scattered into the user's slice of orders
+            restaurant_rows = order_rest_idx[order_start : order_start + n_orders]
+            order_start += n_orders
+            restaurant_rows[repeat_mask] = rng.choice(
+                selected_restaurants, size=n_repeat, replace=True
+            )
+            restaurant_rows[~repeat_mask] = rng.choice(
+                candidate_rows, size=n_orders - n_repeat, p=selection_prob
+            )
 
-        # Sort by timestamp
-        self.orders_df = self.orders_df.sort_values("order_timestamp").reset_index(
-            drop=True
+        # One row per order: expand users and gather restaurant attributes
+        order_user_idx = np.repeat(np.arange(len(users), dtype=np.int32), order_counts)
+        order_price_range = price_range_arr[order_rest_idx]
+
+        # Order value based on user's avg and restaurant's price range
+        base_value = users["avg_order_value"].to_numpy()[order_user_idx]
+        order_value = np.round(
+            base_value * (order_price_range / 2.0) * rng.uniform(0.8, 1.2, n_total), 2
         )
 
+        # Order timestamp (random over past 6 months)
+        days_ago = rng.integers(0, 180, n_total)
+        # One vectorized subtraction on second-resolution datetime64 values
+        now = np.datetime64(pd.Timestamp.now().floor("s"), "s")
+        order_timestamp = now - days_ago.astype("timedelta64[D]")
+
+        # Delivery time (close to restaurant's avg)
+        delivery_time = np.maximum(
+            15,
+            delivery_arr[order_rest_idx] + rng.integers(-5, 10, n_total),
+        )
+
+        # User rating (close to their avg)
+        rating = users["avg_rating_given"].to_numpy()[order_user_idx] + rng.uniform(
+            -0.5, 0.5, n_total
+        )
+
+        self.orders_df = pd.DataFrame(
+            {
+                "order_id": np.char.add(
+                    "order_", np.char.zfill(np.arange(n_total).astype(str), 8)
+                ),
+                "user_id": users["user_id"].to_numpy()[order_user_idx],
+                "restaurant_id": restaurant_ids[order_rest_idx],
+                "order_value": order_value,
+                "order_timestamp": order_timestamp,
+                "delivery_time": delivery_time.astype(np.int16),
+                "user_rating": np.round(np.clip(rating, 1, 5), 1),
+                "cuisine_type": restaurants["cuisine_type"].array.take(order_rest_idx),
+                "price_range": order_price_range.astype(np.int8),
+            }
+        )
+
+        # Sort by timestamp
+        self.orders_df = self.orders_df.sort_values(
+            "order_timestamp", kind="stable"
+        ).reset_index(drop=True)
+
         print(f"✅ Generated {len(self.orders_df):,} orders")
         return self.orders_df
 
     def save_data(self):
         """
-        Save all generated data to CSV files
+        Save all generated data to Parquet files (zstd-compressed, dtypes kept)
         """
-        if self.users_df is not None:
-            self.users_df.to_csv(SYNTHETIC_DATA_DIR / "users.csv", index=False)
-            print(f"💾 Saved users to {SYNTHETIC_DATA_DIR / 'users.csv'}")
-
-        if self.restaurants_df is not None:
-            self.restaurants_df.to_csv(
-                SYNTHETIC_DATA_DIR / "restaurants.csv", index=False
-            )
-            print(f"💾 Saved restaurants to {SYNTHETIC_DATA_DIR / 'restaurants.csv'}")
-
-        if self.orders_df is not None:
-            self.orders_df.to_csv(SYNTHETIC_DATA_DIR / "orders.csv", index=False)
-            print(f"💾 Saved orders to {SYNTHETIC_DATA_DIR / 'orders.csv'}")
+        for name, df in [
+            ("users", self.users_df),
+            ("restaurants", self.restaurants_df),
+            ("orders", self.orders_df),
+        ]:
+            if df is not None:
+                path = SYNTHETIC_DATA_DIR / f"{name}.parquet"
+                df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+                print(f"💾 Saved {name} to {path}")
 
     def generate_summary_stats(self):
         """
@@ -415,6 +446,8 @@ if __name__ == "__main__":
     print("=" * 80)
     print()
 
+    ensure_dirs()
+
     generator = RestaurantDataGenerator()
 
     # Generate data
@@ -5,9 +5,66 @@ Evaluates recommendation quality using multiple metrics
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from sklearn.metrics import mean_squared_error, mean_absolute_error
+from joblib import Parallel, delayed
 from config import *
+from data_generator import load_data_file
+
+
+def _hit_metrics(
+    rec_codes: np.ndarray,
+    actual_codes: np.ndarray,
+    actual_offsets: np.ndarray,
+    k_values: List[int],
+    discounts: np.ndarray,
+    idcg: np.ndarray,
+) -> Dict[str, Dict[int, np.ndarray]]:
+    """
+    Precision, recall, hit rate and NDCG @k for many users at once
+
+    Args:
+        rec_codes: [n_users, max_k] recommended restaurant codes, padded with -1
+        actual_codes: Distinct test restaurant codes of all users, concatenated
+        actual_offsets: Start of each user's codes in actual_codes (n_users + 1)
+        k_values: List of k values
+        discounts: Position discounts 1/log2(i+2), at least max_k long
+        idcg: IDCG by number of relevant items
+
+    Returns:
+        Dict of metric name -> {k: per-user scores}
+    """
+    n_users, max_k = rec_codes.shape
+    n_actual = np.diff(actual_offsets)
+
+    # Offset codes by user so one isin call checks every user's own actuals;
+    # padding (-1) lands on an unused code and never hits
+    n_codes = max(rec_codes.max(initial=-1), actual_codes.max(initial=-1)) + 2
+    user_offsets = np.arange(n_users, dtype=np.int64) * n_codes
+    actual_keys = np.repeat(user_offsets, n_actual) + actual_codes
+    hits = np.isin(user_offsets[:, None] + rec_codes, actual_keys).view(np.uint8)
+
+    # Running hit counts and DCG (relevance 1 per hit) at every position, so
+    # each @k metric is a single column
+    hits_prefix = np.cumsum(hits, axis=1, dtype=np.int32)
+    dcg_prefix = np.cumsum(hits * discounts[:max_k], axis=1)
+
+    metrics = {"precision": {}, "recall": {}, "hit_rate": {}, "ndcg": {}}
+    for k in k_values:
+        top = min(k, max_k)
+        n_hits = hits_prefix[:, top - 1] if top > 0 else np.zeros(n_users, int)
+        metrics["precision"][k] = n_hits / k if k > 0 else np.zeros(n_users)
+        metrics["recall"][k] = n_hits / n_actual
+        metrics["hit_rate"][k] = (n_hits > 0).astype(float)
+
+        # IDCG puts all relevant items on top
+        dcg = dcg_prefix[:, top - 1] if top > 0 else np.zeros(n_users)
+        ideal = idcg[np.minimum(n_actual, k)]
+        metrics["ndcg"][k] = np.divide(
+            dcg, ideal, out=np.zeros(n_users), where=ideal > 0
+        )
+
+    return metrics
 
 
 class RecommendationEvaluator:
@@ -23,6 +80,50 @@ class RecommendationEvaluator:
         """
         self.test_orders = test_orders
         self.restaurant_features = restaurant_features
+        # Integer codes for restaurant ids: catalog first, then test-only ids.
+        # Recommended ids outside this index get code -1 and never count as hits
+        self.restaurant_index = pd.Index(
+            pd.unique(
+                np.concatenate(
+                    [
+                        restaurant_features["restaurant_id"].to_numpy(dtype=object),
+                        test_orders["restaurant_id"].to_numpy(dtype=object),
+                    ]
+                )
+            )
+        )
+        test_restaurant_codes = self.restaurant_index.get_indexer(
+            test_orders["restaurant_id"]
+        ).astype(np.int32)
+        # Distinct test-set restaurant codes per user; users without test
+        # orders are simply absent
+        self.actual_orders_by_user = (
+            pd.Series(test_restaurant_codes)
+            .groupby(test_orders["user_id"].to_numpy(), sort=False)
+            .unique()
+            .to_dict()
+        )
+        # Cuisine code per restaurant code (NaN cuisine is -1, test-only ids -2)
+        catalog = restaurant_features.drop_duplicates("restaurant_id")
+        self._n_catalog = len(catalog)
+        self._cuisine_codes = np.full(len(self.restaurant_index), -2, dtype=np.int32)
+        self._cuisine_codes[: self._n_catalog] = pd.factorize(catalog["cuisine_type"])[
+            0
+        ]
+        # Position discounts 1/log2(i+2) and their running sums (IDCG by number
+        # of relevant items), grown on demand for larger k
+        self._discounts = np.empty(0)
+        self._idcg = np.zeros(1)
+        self._extend_discount_tables(50)
+
+    def _extend_discount_tables(self, k: int):
+        """
+        Make sure the discount and IDCG tables cover the top-k positions
+        """
+        if k <= len(self._discounts):
+            return
+        self._discounts = 1.0 / np.log2(np.arange(2, k + 2))
+        self._idcg = np.concatenate(([0.0], np.cumsum(self._discounts)))
 
     def precision_at_k(
         self, recommendations: List[str], actual_orders: List[str], k: int = 10
@@ -94,42 +195,52 @@ class RecommendationEvaluator:
             NDCG score (0-1)
         """
         top_k_recs = recommendations[:k]
+        self._extend_discount_tables(k)
 
         # Calculate DCG (Discounted Cumulative Gain)
-        dcg = 0.0
-        for i, restaurant_id in enumerate(top_k_recs):
-            if restaurant_id in actual_orders:
-                # Relevance = 1 if ordered, 0 otherwise
-                # Discount by position (1-indexed)
-                dcg += 1.0 / np.log2(i + 2)  # +2 because log2(1) = 0
+        # Relevance = 1 if ordered, 0 otherwise, discounted by position
+        hits = np.fromiter(
+            (r in actual_orders for r in top_k_recs), dtype=bool, count=len(top_k_recs)
+        )
+        dcg = self._discounts[: len(hits)] @ hits
 
         # Calculate IDCG (Ideal DCG)
         # Best case: all relevant items at top
         n_relevant = min(len(actual_orders), k)
-        idcg = sum(1.0 / np.log2(i + 2) for i in range(n_relevant))
+        idcg = self._idcg[n_relevant]
 
         # Normalize
         ndcg = dcg / idcg if idcg > 0 else 0.0
         return ndcg
 
-    def diversity_score(self, recommendations: List[str]) -> float:
+    def diversity_score(
+        self,
+        recommendations: List[str],
+        recommendation_codes: Optional[np.ndarray] = None,
+    ) -> float:
         """
         Cuisine diversity in recommendations
         Higher diversity = better discovery
 
+        Args:
+            recommendations: List of recommended restaurant_ids
+            recommendation_codes: Optional precomputed restaurant codes of
+                recommendations (see restaurant_index)
+
         Returns:
             Diversity score (0-1)
         """
         if len(recommendations) == 0:
             return 0.0
 
-        # Get cuisines for recommended restaurants
-        recommended_restaurants = self.restaurant_features[
-            self.restaurant_features["restaurant_id"].isin(recommendations)
-        ]
-
-        cuisines = recommended_restaurants["cuisine_type"].values
-        unique_cuisines = len(set(cuisines))
+        # Get cuisines for recommended restaurants in the catalog
+        if recommendation_codes is None:
+            recommendation_codes = self.restaurant_index.get_indexer(recommendations)
+        in_catalog = (recommendation_codes >= 0) & (
+            recommendation_codes < self._n_catalog
+        )
+        cuisines = self._cuisine_codes[np.unique(recommendation_codes[in_catalog])]
+        unique_cuisines = np.unique(cuisines).size
 
         # Normalize by total cuisines available
         max_diversity = min(len(cuisines), len(CUISINE_TYPES))
@@ -138,21 +249,42 @@ class RecommendationEvaluator:
         return diversity
 
     def novelty_score(
-        self, recommendations: List[str], user_order_history: List[str]
+        self,
+        recommendations: List[str],
+        user_order_history: List[str],
+        recommendation_codes: Optional[np.ndarray] = None,
     ) -> float:
         """
         Novelty: How many new restaurants are recommended?
 
+        Args:
+            recommendations: List of recommended restaurant_ids
+            user_order_history: Restaurants the user ordered from before
+            recommendation_codes: Optional precomputed restaurant codes of
+                recommendations (see restaurant_index)
+
         Returns:
             Proportion of new restaurants (0-1)
         """
         if len(recommendations) == 0:
             return 0.0
 
-        # Count restaurants user hasn't tried before
-        new_restaurants = [r for r in recommendations if r not in user_order_history]
+        history_codes = self.restaurant_index.get_indexer(user_order_history)
+        if (history_codes < 0).any():
+            # History outside the known ids: compare the ids directly
+            new_restaurants = [
+                r for r in recommendations if r not in user_order_history
+            ]
+            return len(new_restaurants) / len(recommendations)
 
-        novelty = len(new_restaurants) / len(recommendations)
+        if recommendation_codes is None:
+            recommendation_codes = self.restaurant_index.get_indexer(recommendations)
+
+        # Count restaurants user hasn't tried before (no shared scratch state,
+        # so evaluate_model can call this from worker threads)
+        n_new = np.count_nonzero(~np.isin(recommendation_codes, history_codes))
+
+        novelty = n_new / len(recommendations)
         return novelty
 
     def coverage_score(self, all_recommendations: List[List[str]]) -> float:
@@ -180,7 +312,11 @@ class RecommendationEvaluator:
         return coverage
 
     def evaluate_model(
-        self, recommender, test_users: List[str], k_values: List[int] = [5, 10, 20]
+        self,
+        recommender,
+        test_users: List[str],
+        k_values: List[int] = [5, 10, 20],
+        n_jobs: int = -1,
     ) -> Dict:
         """
         Comprehensive model evaluation
@@ -189,76 +325,68 @@ class RecommendationEvaluator:
             recommender: Fitted recommendation model
             test_users: List of user_ids to test on
             k_values: List of k values for @k metrics
+            n_jobs: Parallel workers for per-user recommendations (-1 = all cores)
 
         Returns:
             Dict with all evaluation metrics
         """
         print(f"📊 Evaluating model on {len(test_users)} test users...")
 
-        metrics = {
-            "precision": {k: [] for k in k_values},
-            "recall": {k: [] for k in k_values},
-            "hit_rate": {k: [] for k in k_values},
-            "ndcg": {k: [] for k in k_values},
-            "diversity": [],
-            "novelty": [],
-        }
-
-        all_recommendations = []
+        metrics = {}
+        max_k = max(k_values)
+        self._extend_discount_tables(max_k)
 
-        for user_id in test_users:
-            # Get actual orders for this user in test set
-            actual_orders = (
-                self.test_orders[self.test_orders["user_id"] == user_id][
-                    "restaurant_id"
-                ]
-                .unique()
-                .tolist()
-            )
-
-            if len(actual_orders) == 0:
-                continue  # Skip users with no test orders
-
-            # Get user's historical orders (before test period)
-            user_history = recommender.cf_model.get_user_order_history(user_id)
+        actual_orders_by_user = self.actual_orders_by_user
+        # Skip users with no test orders
+        eval_users = [
+            user_id for user_id in test_users if user_id in actual_orders_by_user
+        ]
 
-            # Generate recommendations
+        # Generate recommendations for all test users in one batch when the
+        # recommender supports it
+        batch_recommendations = {}
+        if hasattr(recommender, "recommend_batch"):
             try:
-                recommendations_df = recommender.recommend(
-                    user_id=user_id,
-                    n_recommendations=max(k_values),
-                    exclude_ordered=True,
+                batch_recommendations = recommender.recommend_batch(
+                    eval_users, n_recommendations=max_k, exclude_ordered=True
                 )
-
-                recommended_restaurants = recommendations_df["restaurant_id"].tolist()
-                all_recommendations.append(recommended_restaurants)
-
             except Exception as e:
-                print(f"   Error generating recommendations for {user_id}: {e}")
-                continue
+                print(f"   Batch recommendation failed, falling back per user: {e}")
 
-            # Calculate metrics for each k
-            for k in k_values:
-                metrics["precision"][k].append(
-                    self.precision_at_k(recommended_restaurants, actual_orders, k)
-                )
-                metrics["recall"][k].append(
-                    self.recall_at_k(recommended_restaurants, actual_orders, k)
-                )
-                metrics["hit_rate"][k].append(
-                    self.hit_rate_at_k(recommended_restaurants, actual_orders, k)
-                )
-                metrics["ndcg"][k].append(
-                    self.ndcg_at_k(recommended_restaurants, actual_orders, k)
-                )
-
-            # Diversity and novelty (calculated once per user)
-            metrics["diversity"].append(
-                self.diversity_score(recommended_restaurants[:10])
+        # Users are independent until aggregation; threads avoid pickling the
+        # recommender and the results keep test_users order
+        user_results = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(self._evaluate_one_user)(
+                user_id, batch_recommendations.get(user_id), recommender, max_k
             )
-            metrics["novelty"].append(
-                self.novelty_score(recommended_restaurants[:10], user_history)
+            for user_id in eval_users
+        )
+
+        user_results = [result for result in user_results if result is not None]
+        all_recommendations = [result["recommendations"] for result in user_results]
+        metrics["diversity"] = [result["diversity"] for result in user_results]
+        metrics["novelty"] = [result["novelty"] for result in user_results]
+
+        # @k metrics for all users in one vectorized pass
+        rec_codes = np.full((len(user_results), max_k), -1, dtype=np.int64)
+        for row, result in enumerate(user_results):
+            rec_codes[row, : len(result["codes"])] = result["codes"]
+        actuals = [actual_orders_by_user[result["user_id"]] for result in user_results]
+        actual_offsets = np.zeros(len(actuals) + 1, dtype=np.int64)
+        np.cumsum([len(actual) for actual in actuals], out=actual_offsets[1:])
+        actual_codes = (
+            np.concatenate(actuals) if actuals else np.empty(0, dtype=np.int64)
+        )
+        metrics.update(
+            _hit_metrics(
+                rec_codes,
+                actual_codes,
+                actual_offsets,
+                k_values,
+                self._discounts,
+                self._idcg,
             )
+        )
 
         # Calculate coverage
         coverage = self.coverage_score(all_recommendations)
@@ -277,6 +405,58 @@ class RecommendationEvaluator:
 
         return results
 
+    def _evaluate_one_user(
+        self,
+        user_id: str,
+        recommendations_df: Optional[pd.DataFrame],
+        recommender,
+        max_k: int,
+    ) -> Optional[Dict]:
+        """
+        Recommendations, their restaurant codes, diversity and novelty for a
+        single test user, or None if recommendations fail
+
+        Args:
+            user_id: Test user
+            recommendations_df: Precomputed recommendations, or None to call
+                recommender.recommend
+            recommender: Fitted recommendation model
+            max_k: Number of recommendations to request
+        """
+        # Get user's historical orders (before test period)
+        user_history = recommender.cf_model.get_user_order_history(user_id)
+
+        # Generate recommendations
+        try:
+            if recommendations_df is None:
+                recommendations_df = recommender.recommend(
+                    user_id=user_id,
+                    n_recommendations=max_k,
+                    exclude_ordered=True,
+                )
+            recommended_restaurants = recommendations_df["restaurant_id"].tolist()
+
+        except Exception as e:
+            print(f"   Error generating recommendations for {user_id}: {e}")
+            return None
+
+        all_rec_codes = self.restaurant_index.get_indexer(recommended_restaurants)
+        result = {
+            "user_id": user_id,
+            "recommendations": recommended_restaurants,
+            "codes": all_rec_codes[:max_k],
+        }
+
+        # Diversity and novelty (calculated once per user)
+        result["diversity"] = self.diversity_score(
+            recommended_restaurants[:10], all_rec_codes[:10]
+        )
+        result["novelty"] = self.novelty_score(
+            recommended_restaurants[:10], user_history, all_rec_codes[:10]
+        )
+
+        return result
+
     def print_evaluation_report(self, results: Dict):
         """
         Print formatted evaluation report
@@ -319,10 +499,10 @@ if __name__ == "__main__":
 
     # Load data
     print("📂 Loading data...")
-    orders_df = pd.read_csv(SYNTHETIC_DATA_DIR / "orders.csv")
+    orders_df = load_data_file(SYNTHETIC_DATA_DIR / "orders.csv")
     orders_df["order_timestamp"] = pd.to_datetime(orders_df["order_timestamp"])
-    restaurant_features = pd.read_csv(PROCESSED_DATA_DIR / "restaurant_features.csv")
-    user_features = pd.read_csv(PROCESSED_DATA_DIR / "user_features.csv")
+    restaurant_features = load_data_file(PROCESSED_DATA_DIR / "restaurant_features.csv")
+    user_features = load_data_file(PROCESSED_DATA_DIR / "user_features.csv")
 
     # Split data: last 20% of orders as test set
     orders_df = orders_df.sort_values("order_timestamp")
@@ -338,9 +518,6 @@ if __name__ == "__main__":
     from collaborative_filtering import CollaborativeFilteringRecommender
     from content_based_filtering import ContentBasedRecommender
 
-    interaction_matrix = pd.read_csv(
-        PROCESSED_DATA_DIR / "interaction_matrix.csv", index_col=0
-    )
     cf_model = CollaborativeFilteringRecommender.load_model()
     cb_model = ContentBasedRecommender.load_model(
         restaurant_features=restaurant_features, user_features=user_features
@@ -7,6 +7,28 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 from config import *
+from data_generator import load_data_file
+
+# Feature columns read when building explanations
+EXPLAINED_RESTAURANT_FIELDS = [
+    "name",
+    "cuisine_type",
+    "avg_rating",
+    "total_reviews",
+    "avg_delivery_time",
+    "avg_order_value",
+    "value_score",
+    "popularity_score",
+]
+EXPLAINED_USER_FIELDS = ["favorite_cuisine"]
+
+# Cuisines that suit each time of day
+TIME_CUISINE_MATCH = {
+    "breakfast": frozenset({"South Indian", "Cafe", "Beverages"}),
+    "lunch": frozenset({"North Indian", "South Indian", "Biryani"}),
+    "dinner": frozenset({"North Indian", "Biryani", "Chinese", "Continental"}),
+    "late_night": frozenset({"Fast Food", "Street Food", "Chinese"}),
+}
 
 
 class ExplainabilityEngine:
@@ -20,6 +42,79 @@ class ExplainabilityEngine:
         self.restaurant_features = restaurant_features
         self.user_features = user_features
         self.cf_model = cf_model
+        # Plain-dict records keyed by id (first row wins) for O(1) lookups,
+        # holding only the fields explanations read
+        self._rest_by_id = self._records_by_id(
+            restaurant_features, "restaurant_id", EXPLAINED_RESTAURANT_FIELDS
+        )
+        self._user_by_id = self._records_by_id(
+            user_features, "user_id", EXPLAINED_USER_FIELDS
+        )
+        # Column of each restaurant in the CF interaction matrix
+        self._rest_col = {
+            restaurant_id: i for i, restaurant_id in enumerate(cf_model.restaurant_ids)
+        }
+        # (top cuisine, count) per CF user, computed for all users at once
+        self._top_cuisine_by_user = self._top_cuisines()
+
+    @staticmethod
+    def _records_by_id(df: pd.DataFrame, id_col: str, fields: List[str]) -> Dict:
+        """
+        Map each id to a dict of the given fields (those present in df)
+        """
+        columns = [col for col in fields if col in df.columns]
+        return df.drop_duplicates(id_col).set_index(id_col)[columns].to_dict("index")
+
+    def _top_cuisines(self) -> Dict:
+        """
+        Most ordered cuisine of every CF user and the number of restaurants
+        of that cuisine in their history, from one pass over the interaction
+        matrix. Ties are broken as value_counts() does: by first appearance
+        in restaurant_features, or by category order for a categorical column.
+        """
+        catalog = self.restaurant_features.drop_duplicates("restaurant_id")
+        cuisine_type = catalog["cuisine_type"]
+        if isinstance(cuisine_type.dtype, pd.CategoricalDtype):
+            cuisine_codes = cuisine_type.cat.codes.to_numpy()
+            cuisines = cuisine_type.cat.categories
+        else:
+            cuisine_codes, cuisines = pd.factorize(cuisine_type)
+
+        # (user row, catalog position) for every restaurant each user ordered from
+        interactions = self.cf_model.sparse_interaction_matrix.tocoo()
+        ordered = interactions.data > 0
+        catalog_pos = pd.Index(catalog["restaurant_id"]).get_indexer(
+            self.cf_model.restaurant_ids
+        )[interactions.col[ordered]]
+        user_rows = interactions.row[ordered]
+        known = catalog_pos >= 0
+        user_rows, catalog_pos = user_rows[known], catalog_pos[known]
+        order_cuisines = cuisine_codes[catalog_pos]
+        has_cuisine = order_cuisines >= 0
+
+        counts = (
+            pd.DataFrame(
+                {
+                    "user": user_rows[has_cuisine],
+                    "cuisine": order_cuisines[has_cuisine],
+                    "first": catalog_pos[has_cuisine],
+                }
+            )
+            .groupby(["user", "cuisine"], sort=False)["first"]
+            .agg(["size", "min"])
+            .reset_index()
+        )
+        tie_break = (
+            "cuisine" if isinstance(cuisine_type.dtype, pd.CategoricalDtype) else "min"
+        )
+        top = counts.sort_values(
+            ["user", "size", tie_break], ascending=[True, False, True]
+        ).drop_duplicates("user")
+
+        return {
+            self.cf_model.user_ids[user]: (cuisines[cuisine], count)
+            for user, cuisine, count in zip(top["user"], top["cuisine"], top["size"])
+        }
 
     def explain(
         self, user_id: str, restaurant_id: str, context: Optional[Dict] = None
@@ -33,71 +128,105 @@ class ExplainabilityEngine:
             - supporting_reasons: List of supporting factors
             - explanation_text: Full human-readable explanation
         """
+        return self._explain(
+            user_id, restaurant_id, context, self._user_context(user_id)
+        )
+
+    def _user_context(self, user_id: str) -> Dict:
+        """
+        Per-user inputs shared by every explanation for that user: profile,
+        order history (as a frozenset), top historical cuisine and similar
+        users' order counts
+        """
+        user = self._user_by_id.get(user_id)
+        in_cf = user_id in self.cf_model.user_id_to_idx
+
+        user_history = []
+        if user is not None or in_cf:
+            user_history = self.cf_model.get_user_order_history(user_id)
+
+        # Most ordered cuisine in the user's history, with its count
+        top_cuisine = None
+        if user is not None:
+            top_cuisine = self._top_cuisine_by_user.get(user_id)
 
+        # Number of similar users who ordered from each restaurant (by CF
+        # column), summed over their rows of the sparse interaction matrix
+        similar_order_counts = None
+        if in_cf:
+            similar_users = self.cf_model.get_similar_users(user_id, k=10)
+            similar_rows = [
+                self.cf_model.user_id_to_idx[uid] for uid, _ in similar_users
+            ]
+            similar_order_counts = np.asarray(
+                (self.cf_model.sparse_interaction_matrix[similar_rows] > 0).sum(axis=0)
+            ).ravel()
+
+        return {
+            "user": user,
+            "in_cf": in_cf,
+            "user_history": frozenset(user_history),
+            "top_cuisine": top_cuisine,
+            "similar_order_counts": similar_order_counts,
+        }
+
+    def _explain(
+        self,
+        user_id: str,
+        restaurant_id: str,
+        context: Optional[Dict],
+        user_context: Dict,
+    ) -> Dict:
+        """
+        Build the explanation for one restaurant from precomputed user inputs
+        """
         # Get restaurant and user data
-        restaurant = self.restaurant_features[
-            self.restaurant_features["restaurant_id"] == restaurant_id
-        ].iloc[0]
-
-        user = (
-            self.user_features[self.user_features["user_id"] == user_id].iloc[0]
-            if user_id in self.user_features["user_id"].values
-            else None
-        )
+        restaurant = self._rest_by_id[restaurant_id]
+        user = user_context["user"]
 
-        reasons = []
+        # Reasons are collected per weight, so they come out high to low
+        high, medium, low = [], [], []
 
         # === 1. User History Match ===
-        if user is not None:
-            user_history = self.cf_model.get_user_order_history(user_id)
+        # Check if user ordered this cuisine before
+        if user_context["top_cuisine"] is not None:
+            top_cuisine, cuisine_count = user_context["top_cuisine"]
 
-            # Check if user ordered this cuisine before
-            if len(user_history) > 0:
-                # Get cuisines from order history
-                historical_cuisines = self.restaurant_features[
-                    self.restaurant_features["restaurant_id"].isin(user_history)
-                ]["cuisine_type"].value_counts()
-
-                if len(historical_cuisines) > 0:
-                    top_cuisine = historical_cuisines.index[0]
-                    cuisine_count = historical_cuisines.iloc[0]
-
-                    if restaurant["cuisine_type"] == top_cuisine:
-                        reasons.append(
-                            {
-                                "type": "user_history",
-                                "weight": "high",
-                                "text": EXPLANATION_TEMPLATES["user_history"].format(
-                                    cuisine=top_cuisine, count=cuisine_count
-                                ),
-                            }
-                        )
+            if restaurant["cuisine_type"] == top_cuisine:
+                high.append(
+                    {
+                        "type": "user_history",
+                        "weight": "high",
+                        "text": EXPLANATION_TEMPLATES["user_history"].format(
+                            cuisine=top_cuisine, count=cuisine_count
+                        ),
+                    }
+                )
 
         # === 2. Similar Users ===
-        if user_id in self.cf_model.interaction_matrix.index:
-            similar_users = self.cf_model.get_similar_users(user_id, k=10)
+        # Check if similar users ordered from this restaurant
+        n_similar_who_ordered = 0
+        restaurant_col = self._rest_col.get(restaurant_id)
+        if (
+            user_context["similar_order_counts"] is not None
+            and restaurant_col is not None
+        ):
+            n_similar_who_ordered = int(
+                user_context["similar_order_counts"][restaurant_col]
+            )
 
-            if similar_users:
-                # Check if similar users ordered from this restaurant
-                similar_user_ids = [uid for uid, _ in similar_users]
-                similar_users_who_ordered = [
-                    uid
-                    for uid in similar_user_ids
-                    if restaurant_id in self.cf_model.get_user_order_history(uid)
-                ]
-
-                if len(similar_users_who_ordered) >= 3:
-                    reasons.append(
-                        {
-                            "type": "collaborative",
-                            "weight": "high",
-                            "text": f"Popular among users with similar taste ({len(similar_users_who_ordered)} similar users love this)",
-                        }
-                    )
+        if n_similar_who_ordered >= 3:
+            high.append(
+                {
+                    "type": "collaborative",
+                    "weight": "high",
+                    "text": f"Popular among users with similar taste ({n_similar_who_ordered} similar users love this)",
+                }
+            )
 
         # === 3. High Rating ===
         if restaurant["avg_rating"] >= 4.0:
-            reasons.append(
+            medium.append(
                 {
                     "type": "quality",
                     "weight": "medium",
@@ -113,18 +242,11 @@ class ExplainabilityEngine:
             time_of_day = context.get("time_of_day")
 
             # Cuisine-time matching
-            time_cuisine_match = {
-                "breakfast": ["South Indian", "Cafe", "Beverages"],
-                "lunch": ["North Indian", "South Indian", "Biryani"],
-                "dinner": ["North Indian", "Biryani", "Chinese", "Continental"],
-                "late_night": ["Fast Food", "Street Food", "Chinese"],
-            }
-
-            if time_of_day and restaurant["cuisine_type"] in time_cuisine_match.get(
-                time_of_day, []
+            if time_of_day and restaurant["cuisine_type"] in TIME_CUISINE_MATCH.get(
+                time_of_day, frozenset()
             ):
                 meal_name = time_of_day.replace("_", " ").title()
-                reasons.append(
+                medium.append(
                     {
                         "type": "contextual",
                         "weight": "medium",
@@ -137,7 +259,7 @@ class ExplainabilityEngine:
         # === 5. Proximity ===
         # Note: Would need user location to calculate actual distance
         if restaurant["avg_delivery_time"] <= 30:
-            reasons.append(
+            low.append(
                 {
                     "type": "proximity",
                     "weight": "low",
@@ -150,21 +272,20 @@ class ExplainabilityEngine:
             # CHANGED: Use actual price instead of symbols
             price_display = f"₹{int(restaurant['avg_order_value'])}"
 
-            reasons.append(
+            low.append(
                 {
                     "type": "value",
                     "weight": "low",
-                    "text": f"Great value for money ({price_display} with {restaurant['avg_rating']}★ rating)",
+                    "text": f"Great value for money ({price_display} with {restaurant['avg_rating']:.1f}★ rating)",
                 }
             )
 
         # === 7. New Discovery ===
-        if user is not None and user_id in self.cf_model.interaction_matrix.index:
-            user_history = self.cf_model.get_user_order_history(user_id)
-            if restaurant_id not in user_history:
+        if user is not None and user_context["in_cf"]:
+            if restaurant_id not in user_context["user_history"]:
                 # Check if it's a new restaurant matching user's preferences
                 if user.get("favorite_cuisine") == restaurant["cuisine_type"]:
-                    reasons.append(
+                    medium.append(
                         {
                             "type": "discovery",
                             "weight": "medium",
@@ -174,7 +295,7 @@ class ExplainabilityEngine:
 
         # === 8. Trending ===
         if restaurant.get("popularity_score", 0) >= 0.7:
-            reasons.append(
+            low.append(
                 {
                     "type": "trending",
                     "weight": "low",
@@ -182,9 +303,8 @@ class ExplainabilityEngine:
                 }
             )
 
-        # === Sort reasons by weight ===
-        weight_order = {"high": 0, "medium": 1, "low": 2}
-        reasons = sorted(reasons, key=lambda x: weight_order[x["weight"]])
+        # === Order reasons by weight ===
+        reasons = high + medium + low
 
         # === Generate Primary Reason ===
         primary_reason = reasons[0]["text"] if reasons else "Recommended for you"
@@ -227,10 +347,10 @@ class ExplainabilityEngine:
             List of explanation dictionaries
         """
         explanations = []
+        user_context = self._user_context(user_id)
 
-        for _, row in recommendations.iterrows():
-            restaurant_id = row["restaurant_id"]
-            explanation = self.explain(user_id, restaurant_id, context)
+        for restaurant_id in recommendations["restaurant_id"].to_numpy():
+            explanation = self._explain(user_id, restaurant_id, context, user_context)
             explanations.append(explanation)
 
         return explanations
@@ -244,11 +364,8 @@ if __name__ == "__main__":
 
     # Load data
     print("📂 Loading data...")
-    restaurant_features = pd.read_csv(PROCESSED_DATA_DIR / "restaurant_features.csv")
-    user_features = pd.read_csv(PROCESSED_DATA_DIR / "user_features.csv")
-    interaction_matrix = pd.read_csv(
-        PROCESSED_DATA_DIR / "interaction_matrix.csv", index_col=0
-    )
+    restaurant_features = load_data_file(PROCESSED_DATA_DIR / "restaurant_features.csv")
+    user_features = load_data_file(PROCESSED_DATA_DIR / "user_features.csv")
 
     from collaborative_filtering import CollaborativeFilteringRecommender
 
@@ -5,11 +5,55 @@ Creates features for ML models
 
 import pandas as pd
 import numpy as np
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, NamedTuple, Optional
 from datetime import datetime
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from scipy.spatial.distance import cdist
+from scipy.sparse import csr_matrix, save_npz
 from config import *
+from data_generator import load_data_file
+
+
+class InteractionMatrix(NamedTuple):
+    """
+    Sparse user × restaurant interaction scores with row/column ids
+    """
+
+    matrix: csr_matrix
+    user_ids: np.ndarray
+    restaurant_ids: np.ndarray
+
+
+def _downcast(df: pd.DataFrame, count_columns: List[str]) -> pd.DataFrame:
+    """
+    Shrink numeric columns in place: counts and other int64 columns to the
+    smallest integer type of at least int16, float64 columns to float32
+    """
+    for col in count_columns + list(df.select_dtypes("int64").columns):
+        values = pd.to_numeric(df[col], downcast="integer")
+        df[col] = values.astype(np.promote_types(values.dtype, np.int16))
+
+    float_columns = df.select_dtypes("float64").columns
+    df[float_columns] = df[float_columns].astype(np.float32)
+    return df
+
+
+def distances_km(
+    lats: np.ndarray, lons: np.ndarray, user_lat: float, user_lon: float
+) -> np.ndarray:
+    """
+    Approximate distance (km) from one point to arrays of coordinates.
+    Not exact haversine: 1 degree lat ≈ 111 km, lon scaled by cos(lat).
+    Works in place on two buffers instead of allocating a temporary per step.
+    """
+    lat_diff = np.subtract(lats, user_lat, dtype=np.float64)
+    lat_diff *= 111
+    lon_diff = np.subtract(lons, user_lon, dtype=np.float64)
+    lon_diff *= 111
+    lon_diff *= np.cos(np.radians(user_lat))
+
+    lat_diff *= lat_diff
+    lon_diff *= lon_diff
+    lat_diff += lon_diff
+    return np.sqrt(lat_diff, out=lat_diff)
 
 
 class FeatureEngineer:
@@ -30,81 +74,82 @@ class FeatureEngineer:
         self.restaurant_features = None
         self.interaction_matrix = None
 
-    def create_user_features(self) -> pd.DataFrame:
+    def create_user_features(
+        self, reference_time: Optional[datetime] = None
+    ) -> pd.DataFrame:
         """
         Create engineered features for users
+
+        Args:
+            reference_time: "Now" for days-since features (default: current time)
         """
+        reference_time = pd.Timestamp(
+            datetime.now() if reference_time is None else reference_time
+        )
         print("🔧 Engineering user features...")
 
-        # Start with base user features
-        user_features = self.users_df.copy()
+        # Start with base user features (the merge below returns a new
+        # frame, so users_df is never modified and needs no copy)
+        user_features = self.users_df
 
         # === Order-based features ===
-        user_order_stats = (
-            self.orders_df.groupby("user_id")
-            .agg(
-                {
-                    "order_id": "count",
-                    "order_value": ["mean", "std", "sum"],
-                    "delivery_time": "mean",
-                    "user_rating": "mean",
-                    "restaurant_id": "nunique",  # Unique restaurants ordered from
-                    "cuisine_type": lambda x: (
-                        x.mode()[0] if not x.empty else None
-                    ),  # Most frequent cuisine
-                }
-            )
-            .reset_index()
+        # All per-user order aggregates in a single groupby pass (unsorted:
+        # the stats are merged onto users_df, which fixes the row order)
+        user_order_stats = self.orders_df.groupby("user_id", sort=False).agg(
+            order_count=("order_id", "count"),
+            avg_order_value=("order_value", "mean"),
+            order_value_std=("order_value", "std"),
+            total_spent=("order_value", "sum"),
+            avg_delivery_time=("delivery_time", "mean"),
+            avg_rating_given=("user_rating", "mean"),
+            # Unique restaurants ordered from
+            unique_restaurants=("restaurant_id", "nunique"),
+            n_cuisines=("cuisine_type", "nunique"),
+            first_order=("order_timestamp", "min"),
         )
 
-        user_order_stats.columns = [
-            "user_id",
-            "order_count",
-            "avg_order_value",
-            "order_value_std",
-            "total_spent",
-            "avg_delivery_time",
-            "avg_rating_given",
-            "unique_restaurants",
+        # Most frequent cuisine (ties go to the first cuisine in sort order,
+        # as Series.mode() does), from one count per (user, cuisine)
+        cuisine_counts = (
+            self.orders_df.groupby(["user_id", "cuisine_type"], observed=True)
+            .size()
+            .reset_index(name="n_orders")
+        )
+        most_ordered = cuisine_counts.loc[
+            cuisine_counts.groupby("user_id")["n_orders"].idxmax()
+        ].set_index("user_id")["cuisine_type"]
+        user_order_stats.insert(
+            user_order_stats.columns.get_loc("n_cuisines"),
             "most_ordered_cuisine",
-        ]
+            most_ordered.reindex(user_order_stats.index),
+        )
+
+        # === Cuisine diversity score ===
+        # How diverse are user's cuisine choices?
+        user_order_stats["cuisine_diversity"] = (
+            user_order_stats.pop("n_cuisines") / user_order_stats["order_count"]
+        )
+
+        # === Recency features ===
+        # Days since first order
+        user_order_stats["days_since_first_order"] = (
+            reference_time - user_order_stats.pop("first_order")
+        ).dt.days
 
         # Merge with base features
-        user_features = user_features.merge(user_order_stats, on="user_id", how="left")
+        user_features = user_features.merge(
+            user_order_stats.reset_index(), on="user_id", how="left"
+        )
 
         # Fill missing values for users with no orders
         user_features["order_count"] = user_features["order_count"].fillna(0)
         user_features["unique_restaurants"] = user_features[
             "unique_restaurants"
         ].fillna(0)
-
-        # === Cuisine diversity score ===
-        # How diverse are user's cuisine choices?
-        cuisine_diversity = (
-            self.orders_df.groupby("user_id")["cuisine_type"]
-            .apply(lambda x: len(x.unique()) / len(x) if len(x) > 0 else 0)
-            .reset_index()
-        )
-        cuisine_diversity.columns = ["user_id", "cuisine_diversity"]
-        user_features = user_features.merge(cuisine_diversity, on="user_id", how="left")
         user_features["cuisine_diversity"] = user_features["cuisine_diversity"].fillna(
             0
         )
 
-        # === Recency features ===
-        # Days since first order
-        user_first_order = (
-            self.orders_df.groupby("user_id")["order_timestamp"].min().reset_index()
-        )
-        user_first_order["days_since_first_order"] = (
-            datetime.now() - user_first_order["order_timestamp"]
-        ).dt.days
-        user_features = user_features.merge(
-            user_first_order[["user_id", "days_since_first_order"]],
-            on="user_id",
-            how="left",
-        )
-
         # === User segment (for easier grouping) ===
         user_features["user_segment"] = "casual"
         user_features.loc[user_features["order_count"] >= 20, "user_segment"] = (
@@ -127,10 +172,14 @@ class FeatureEngineer:
             "dietary_preference"
         ].map(dietary_map)
 
-        # Label encode favorite cuisine
-        le_cuisine = LabelEncoder()
-        user_features["favorite_cuisine_encoded"] = le_cuisine.fit_transform(
-            user_features["favorite_cuisine"]
+        # Label encode favorite cuisine (codes in sorted cuisine order)
+        user_features["favorite_cuisine_encoded"] = pd.factorize(
+            user_features["favorite_cuisine"].to_numpy(dtype=object), sort=True
+        )[0]
+
+        # Counts were float after the merge; store compact dtypes
+        user_features = _downcast(
+            user_features, ["order_count", "unique_restaurants", "total_orders"]
         )
 
         print(f"✅ Created {len(user_features.columns)} user features")
@@ -143,31 +192,23 @@ class FeatureEngineer:
         """
         print("🔧 Engineering restaurant features...")
 
-        restaurant_features = self.restaurants_df.copy()
+        # The merge below returns a new frame, so no copy is needed
+        restaurant_features = self.restaurants_df
 
         # === Order-based restaurant features ===
+        # Single unsorted groupby pass; the merge fixes the row order
         restaurant_order_stats = (
-            self.orders_df.groupby("restaurant_id")
+            self.orders_df.groupby("restaurant_id", sort=False)
             .agg(
-                {
-                    "order_id": "count",
-                    "order_value": ["mean", "sum"],
-                    "user_rating": "mean",
-                    "user_id": "nunique",  # Unique customers
-                }
+                total_orders=("order_id", "count"),
+                avg_order_value=("order_value", "mean"),
+                total_revenue=("order_value", "sum"),
+                avg_user_rating=("user_rating", "mean"),
+                unique_customers=("user_id", "nunique"),  # Unique customers
             )
             .reset_index()
         )
 
-        restaurant_order_stats.columns = [
-            "restaurant_id",
-            "total_orders",
-            "avg_order_value",
-            "total_revenue",
-            "avg_user_rating",
-            "unique_customers",
-        ]
-
         restaurant_features = restaurant_features.merge(
             restaurant_order_stats, on="restaurant_id", how="left"
         )
@@ -192,25 +233,18 @@ class FeatureEngineer:
         )
 
         # === Customer retention rate ===
-        # Customers who ordered more than once from this restaurant
-        repeat_customers = (
-            self.orders_df.groupby(["restaurant_id", "user_id"])
-            .size()
-            .reset_index(name="order_count")
-        )
-        repeat_customers = repeat_customers[repeat_customers["order_count"] > 1]
-        repeat_stats = (
-            repeat_customers.groupby("restaurant_id")
-            .size()
-            .reset_index(name="repeat_customers")
+        # Customers who ordered more than once from this restaurant, from
+        # one orders-per-(restaurant, customer) count
+        orders_per_customer = self.orders_df.groupby(
+            ["restaurant_id", "user_id"], observed=True, sort=False
+        ).size()
+        repeat_counts = (
+            orders_per_customer[orders_per_customer > 1].groupby(level=0).size()
         )
 
-        restaurant_features = restaurant_features.merge(
-            repeat_stats, on="restaurant_id", how="left"
+        restaurant_features["repeat_customers"] = (
+            restaurant_features["restaurant_id"].map(repeat_counts).fillna(0)
         )
-        restaurant_features["repeat_customers"] = restaurant_features[
-            "repeat_customers"
-        ].fillna(0)
 
         restaurant_features["retention_rate"] = restaurant_features[
             "repeat_customers"
@@ -240,25 +274,40 @@ class FeatureEngineer:
         ] = "popular"
 
         # === Encoding categorical variables ===
-        le_cuisine = LabelEncoder()
-        restaurant_features["cuisine_type_encoded"] = le_cuisine.fit_transform(
-            restaurant_features["cuisine_type"]
-        )
+        # Cuisine codes in sorted cuisine order
+        restaurant_features["cuisine_type_encoded"] = pd.factorize(
+            restaurant_features["cuisine_type"].to_numpy(dtype=object), sort=True
+        )[0]
 
         # Veg indicator (already boolean, convert to int)
         restaurant_features["is_veg_only_int"] = restaurant_features[
             "is_veg_only"
         ].astype(int)
 
+        # Counts were float after the merges; store compact dtypes
+        restaurant_features = _downcast(
+            restaurant_features,
+            ["total_orders", "unique_customers", "repeat_customers"],
+        )
+
         print(f"✅ Created {len(restaurant_features.columns)} restaurant features")
         self.restaurant_features = restaurant_features
         return restaurant_features
 
-    def create_user_restaurant_matrix(self) -> pd.DataFrame:
+    def create_user_restaurant_matrix(
+        self, reference_time: Optional[datetime] = None
+    ) -> InteractionMatrix:
         """
         Create user-restaurant interaction matrix for collaborative filtering
-        Format: rows=users, columns=restaurants, values=interaction_score
+        Format: CSR with rows=users, columns=restaurants (both sorted by id),
+        values=interaction_score; pairs without orders are implicit zeros
+
+        Args:
+            reference_time: "Now" for the recency decay (default: current time)
         """
+        reference_time = pd.Timestamp(
+            datetime.now() if reference_time is None else reference_time
+        )
         print("🔧 Creating user-restaurant interaction matrix...")
 
         # Calculate interaction score based on:
@@ -266,7 +315,7 @@ class FeatureEngineer:
         # - Recency of orders
         # - User rating
 
-        interactions = self.orders_df.copy()
+        interactions = self.orders_df
 
         # Frequency score
         user_restaurant_orders = (
@@ -285,7 +334,7 @@ class FeatureEngineer:
 
         # Recency score (exponential decay)
         days_since_last = (
-            datetime.now() - user_restaurant_orders["last_order"]
+            reference_time - user_restaurant_orders["last_order"]
         ).dt.days
         user_restaurant_orders["recency_score"] = np.exp(
             -days_since_last / 30
@@ -299,16 +348,32 @@ class FeatureEngineer:
             + 0.3 * user_restaurant_orders["recency_score"]
         )
 
-        # Pivot to matrix format
-        interaction_matrix = user_restaurant_orders.pivot(
-            index="user_id", columns="restaurant_id", values="interaction_score"
-        ).fillna(0)
+        # Sparse matrix straight from the (user, restaurant, score) triples
+        user_codes, user_ids = pd.factorize(
+            user_restaurant_orders["user_id"], sort=True
+        )
+        restaurant_codes, restaurant_ids = pd.factorize(
+            user_restaurant_orders["restaurant_id"], sort=True
+        )
+        n_users, n_restaurants = len(user_ids), len(restaurant_ids)
+        matrix = csr_matrix(
+            (
+                user_restaurant_orders["interaction_score"].to_numpy(dtype=np.float64),
+                (user_codes, restaurant_codes),
+            ),
+            shape=(n_users, n_restaurants),
+        )
+        interaction_matrix = InteractionMatrix(
+            matrix,
+            np.asarray(user_ids, dtype=object),
+            np.asarray(restaurant_ids, dtype=object),
+        )
 
         print(
-            f"✅ Created interaction matrix: {interaction_matrix.shape[0]} users × {interaction_matrix.shape[1]} restaurants"
+            f"✅ Created interaction matrix: {n_users} users × {n_restaurants} restaurants"
         )
         print(
-            f"   Sparsity: {(interaction_matrix == 0).sum().sum() / (interaction_matrix.shape[0] * interaction_matrix.shape[1]) * 100:.1f}%"
+            f"   Sparsity: {(1 - matrix.nnz / max(n_users * n_restaurants, 1)) * 100:.1f}%"
         )
 
         self.interaction_matrix = interaction_matrix
@@ -328,26 +393,18 @@ class FeatureEngineer:
         """
         user_lat, user_lon = user_location
 
-        # Calculate haversine distance
-        restaurant_coords = self.restaurant_features[
-            ["restaurant_id", "location_lat", "location_lon"]
-        ].copy()
-
-        # Simplified distance calculation (not exact haversine)
-        # For demo purposes, using Euclidean distance with lat/lon scaling
-        lat_diff = (
-            restaurant_coords["location_lat"] - user_lat
-        ) * 111  # 1 degree lat ≈ 111 km
-        lon_diff = (
-            (restaurant_coords["location_lon"] - user_lon)
-            * 111
-            * np.cos(np.radians(user_lat))
+        return pd.DataFrame(
+            {
+                "restaurant_id": self.restaurant_features["restaurant_id"].to_numpy(),
+                "distance_km": distances_km(
+                    self.restaurant_features["location_lat"].to_numpy(),
+                    self.restaurant_features["location_lon"].to_numpy(),
+                    user_lat,
+                    user_lon,
+                ),
+            }
         )
 
-        restaurant_coords["distance_km"] = np.sqrt(lat_diff**2 + lon_diff**2)
-
-        return restaurant_coords[["restaurant_id", "distance_km"]]
-
     def create_contextual_features(self, context: Dict) -> Dict:
         """
         Create features based on current context
@@ -401,30 +458,33 @@ class FeatureEngineer:
 
     def save_features(self):
         """
-        Save engineered features to files
+        Save engineered features to Parquet files (zstd-compressed, dtypes kept)
         """
-        if self.user_features is not None:
-            self.user_features.to_csv(
-                PROCESSED_DATA_DIR / "user_features.csv", index=False
-            )
-            print(
-                f"💾 Saved user features to {PROCESSED_DATA_DIR / 'user_features.csv'}"
-            )
+        for name, df in [
+            ("user_features", self.user_features),
+            ("restaurant_features", self.restaurant_features),
+        ]:
+            if df is not None:
+                path = PROCESSED_DATA_DIR / f"{name}.parquet"
+                df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+                print(f"💾 Saved {name.replace('_', ' ')} to {path}")
 
-        if self.restaurant_features is not None:
-            self.restaurant_features.to_csv(
-                PROCESSED_DATA_DIR / "restaurant_features.csv", index=False
+        if self.interaction_matrix is not None:
+            save_npz(
+                PROCESSED_DATA_DIR / "interaction_matrix.npz",
+                self.interaction_matrix.matrix,
             )
-            print(
-                f"💾 Saved restaurant features to {PROCESSED_DATA_DIR / 'restaurant_features.csv'}"
+            # Fixed-width string arrays load without pickle
+            np.save(
+                PROCESSED_DATA_DIR / "interaction_user_ids.npy",
+                self.interaction_matrix.user_ids.astype(str),
             )
-
-        if self.interaction_matrix is not None:
-            self.interaction_matrix.to_csv(
-                PROCESSED_DATA_DIR / "interaction_matrix.csv"
+            np.save(
+                PROCESSED_DATA_DIR / "interaction_restaurant_ids.npy",
+                self.interaction_matrix.restaurant_ids.astype(str),
             )
             print(
-                f"💾 Saved interaction matrix to {PROCESSED_DATA_DIR / 'interaction_matrix.csv'}"
+                f"💾 Saved interaction matrix to {PROCESSED_DATA_DIR / 'interaction_matrix.npz'}"
             )
 
 
@@ -434,11 +494,13 @@ if __name__ == "__main__":
     print("=" * 80)
     print()
 
+    ensure_dirs()
+
     # Load data
     print("📂 Loading data...")
-    users_df = pd.read_csv(SYNTHETIC_DATA_DIR / "users.csv")
-    restaurants_df = pd.read_csv(SYNTHETIC_DATA_DIR / "restaurants.csv")
-    orders_df = pd.read_csv(SYNTHETIC_DATA_DIR / "orders.csv")
+    users_df = load_data_file(SYNTHETIC_DATA_DIR / "users.csv")
+    restaurants_df = load_data_file(SYNTHETIC_DATA_DIR / "restaurants.csv")
+    orders_df = load_data_file(SYNTHETIC_DATA_DIR / "orders.csv")
     orders_df["order_timestamp"] = pd.to_datetime(orders_df["order_timestamp"])
 
     # Engineer features
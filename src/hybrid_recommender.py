@@ -7,9 +7,69 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 import pickle
+from functools import lru_cache
 from config import *
+from data_generator import load_data_file
 from collaborative_filtering import CollaborativeFilteringRecommender
 from content_based_filtering import ContentBasedRecommender
+from feature_engineering import distances_km
+
+# Contextual cuisine multipliers (cuisines not listed keep a factor of 1.0)
+TIME_CUISINE_BOOST = {
+    "breakfast": pd.Series(
+        {"South Indian": 1.3, "Cafe": 1.4, "Fast Food": 1.2, "Beverages": 1.3}
+    ),
+    "lunch": pd.Series(
+        {"North Indian": 1.2, "South Indian": 1.2, "Biryani": 1.3, "Chinese": 1.1}
+    ),
+    "dinner": pd.Series(
+        {"North Indian": 1.3, "Biryani": 1.4, "Chinese": 1.2, "Continental": 1.1}
+    ),
+    "late_night": pd.Series({"Fast Food": 1.5, "Street Food": 1.4, "Chinese": 1.2}),
+}
+
+WEATHER_BOOST = {
+    "rainy": pd.Series(
+        {
+            "Street Food": 0.6,  # Penalize street food in rain
+            "Fast Food": 1.3,  # Boost comfort food
+            "Chinese": 1.2,
+        }
+    ),
+    "hot": pd.Series({"Beverages": 1.5, "Desserts": 1.3, "South Indian": 1.1}),
+}
+
+
+def _boost_table(
+    boosts_by_context: Dict[str, pd.Series], cuisines: pd.Index
+) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    Row index per context value and a (contexts + 1) × (cuisines + 1) table
+    of boost factors. The last row (unknown context) and the last column
+    (code -1, unknown cuisine) are all 1.0
+    """
+    table = np.ones((len(boosts_by_context) + 1, len(cuisines) + 1))
+    for row, boosts in enumerate(boosts_by_context.values()):
+        table[row, :-1] = boosts.reindex(cuisines, fill_value=1.0).to_numpy(float)
+    return {key: row for row, key in enumerate(boosts_by_context)}, table
+
+
+def _scores_for(
+    restaurant_ids: np.ndarray,
+    scored_ids: np.ndarray,
+    recommendations: pd.DataFrame,
+    score_col: str,
+) -> np.ndarray:
+    """
+    Align one model's scores to restaurant_ids, 0.0 where it has none
+    """
+    scores = np.zeros(len(restaurant_ids))
+    if len(scored_ids) == 0:
+        return scores
+    positions = pd.Index(scored_ids).get_indexer(restaurant_ids)
+    found = positions >= 0
+    scores[found] = recommendations[score_col].to_numpy(float)[positions[found]]
+    return scores
 
 
 class HybridRecommender:
@@ -36,6 +96,38 @@ class HybridRecommender:
         self.restaurant_features = restaurant_features
         self.user_features = user_features
         self.weights = MODEL_WEIGHTS.copy()
+        self._explainer = None  # built on first explain_recommendation call
+        # Order histories are re-read when the same user is scored again
+        # (other contexts, locations); cached per instance as tuples
+        self._order_history = lru_cache(maxsize=4096)(self._fetch_order_history)
+
+        # Columns used for scoring as contiguous arrays, read by catalog row
+        # instead of merging restaurant_features on every request
+        self._restaurant_index = pd.Index(restaurant_features["restaurant_id"])
+        self._lat = restaurant_features["location_lat"].to_numpy()
+        self._lon = restaurant_features["location_lon"].to_numpy()
+        self._popularity = restaurant_features["popularity_score"].to_numpy()
+        self._rating = restaurant_features["avg_rating"].to_numpy()
+        # Metadata returned with the top-N
+        self._restaurant_details = restaurant_features[
+            [
+                "restaurant_id",
+                "name",
+                "cuisine_type",
+                "avg_rating",
+                "price_range",
+                "avg_delivery_time",
+                "avg_order_value",
+            ]
+        ]
+
+        # Integer cuisine codes, so contextual boosts are a table lookup
+        # instead of string comparisons on every request
+        self._cuisine_codes, cuisines = pd.factorize(
+            restaurant_features["cuisine_type"]
+        )
+        self._time_idx, self._time_boost = _boost_table(TIME_CUISINE_BOOST, cuisines)
+        self._weather_idx, self._weather_boost = _boost_table(WEATHER_BOOST, cuisines)
 
     def recommend(
         self,
@@ -60,7 +152,7 @@ class HybridRecommender:
         """
 
         # Get user order history
-        user_order_history = self.cf_model.get_user_order_history(user_id)
+        user_order_history = list(self._order_history(user_id))
         has_history = len(user_order_history) >= MIN_ORDERS_FOR_CF
 
         # === 1. Collaborative Filtering Scores ===
@@ -81,69 +173,116 @@ class HybridRecommender:
             user_order_history=user_order_history if exclude_ordered else None,
         )
 
-        # === 3. Merge Scores ===
-        # Start with all unique restaurants from both models
-        all_restaurants = (
-            pd.concat(
-                [
-                    (
-                        cf_recommendations[["restaurant_id"]]
-                        if len(cf_recommendations) > 0
-                        else pd.DataFrame(columns=["restaurant_id"])
-                    ),
-                    cb_recommendations[["restaurant_id"]],
-                ]
-            )
-            .drop_duplicates()
-            .reset_index(drop=True)
+        return self._combine_scores(
+            cf_recommendations,
+            cb_recommendations,
+            has_history,
+            n_recommendations,
+            context,
+            user_location,
+        )
+
+    def recommend_batch(
+        self,
+        user_ids: List[str],
+        n_recommendations: int = 10,
+        context: Optional[Dict] = None,
+        user_location: Optional[Tuple[float, float]] = None,
+        exclude_ordered: bool = True,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Generate hybrid recommendations for many users at once
+
+        CF candidates come from one cf_model.recommend_batch call and CB
+        candidates from one cb_model.recommend_many call; only the final
+        merge and ranking run per user.
+
+        Returns:
+            Dict mapping user_id to the same DataFrame recommend() returns
+        """
+        user_ids = list(user_ids)
+        histories = {
+            user_id: list(self._order_history(user_id)) for user_id in user_ids
+        }
+        cf_users = [
+            user_id
+            for user_id in user_ids
+            if len(histories[user_id]) >= MIN_ORDERS_FOR_CF
+        ]
+
+        # === 1. Collaborative Filtering Scores ===
+        cf_batch = self.cf_model.recommend_batch(
+            cf_users, n_recommendations=50, exclude_already_ordered=exclude_ordered
+        )
+
+        # === 2. Content-Based Scores ===
+        cb_batch = self.cb_model.recommend_many(
+            user_ids,
+            n_recommendations=50,
+            user_order_histories=histories if exclude_ordered else None,
         )
 
-        # Merge CF scores
-        if len(cf_recommendations) > 0:
-            all_restaurants = all_restaurants.merge(
-                cf_recommendations[["restaurant_id", "cf_score"]],
-                on="restaurant_id",
-                how="left",
+        empty_cf = pd.DataFrame(columns=["restaurant_id", "cf_score"])
+        return {
+            user_id: self._combine_scores(
+                cf_batch.get(user_id, empty_cf),
+                cb_batch[user_id],
+                user_id in cf_batch,
+                n_recommendations,
+                context,
+                user_location,
             )
-        else:
-            all_restaurants["cf_score"] = 0.0
+            for user_id in user_ids
+        }
 
-        # Merge CB scores
-        all_restaurants = all_restaurants.merge(
-            cb_recommendations[["restaurant_id", "content_score"]],
-            on="restaurant_id",
-            how="left",
+    def _fetch_order_history(self, user_id: str) -> Tuple[str, ...]:
+        """
+        Restaurants the user has ordered from, as an immutable tuple
+        """
+        return tuple(self.cf_model.get_user_order_history(user_id))
+
+    def _combine_scores(
+        self,
+        cf_recommendations: pd.DataFrame,
+        cb_recommendations: pd.DataFrame,
+        has_history: bool,
+        n_recommendations: int,
+        context: Optional[Dict],
+        user_location: Optional[Tuple[float, float]],
+    ) -> pd.DataFrame:
+        """
+        Merge CF and CB candidates, add context and rank the top-N
+        """
+        # === 3. Merge Scores ===
+        # Start with all unique restaurants from both models (first seen
+        # order); a model that did not score a restaurant gives it 0
+        cf_ids = cf_recommendations["restaurant_id"].to_numpy(dtype=object)
+        cb_ids = cb_recommendations["restaurant_id"].to_numpy(dtype=object)
+        restaurant_ids = pd.unique(np.concatenate([cf_ids, cb_ids]))
+        cf_score = _scores_for(restaurant_ids, cf_ids, cf_recommendations, "cf_score")
+        content_score = _scores_for(
+            restaurant_ids, cb_ids, cb_recommendations, "content_score"
         )
 
-        # Fill missing scores with 0
-        all_restaurants["cf_score"] = all_restaurants["cf_score"].fillna(0)
-        all_restaurants["content_score"] = all_restaurants["content_score"].fillna(0)
-
-        # === 4. Add Restaurant Features ===
-        all_restaurants = all_restaurants.merge(
-            self.restaurant_features[
-                [
-                    "restaurant_id",
-                    "name",
-                    "cuisine_type",
-                    "avg_rating",
-                    "price_range",
-                    "avg_delivery_time",
-                    "popularity_score",
-                    "location_lat",
-                    "location_lon",
-                    "avg_order_value",
-                ]
-            ],
-            on="restaurant_id",
-            how="left",
+        # === 4. Look Up Restaurant Rows ===
+        # Candidates missing from restaurant_features have no rating and
+        # could never pass the rating filter, so drop them up front
+        rows = self._restaurant_index.get_indexer(restaurant_ids)
+        known = rows >= 0
+        rows, cf_score, content_score = (
+            rows[known],
+            cf_score[known],
+            content_score[known],
         )
 
         # === 5. Contextual Scoring ===
+        # Distances feed both the contextual penalty and the distance filter
+        distances = (
+            self._calculate_distances(rows, user_location) if user_location else None
+        )
         contextual_score = self._compute_contextual_score(
-            all_restaurants, context, user_location
+            rows, context, user_location, distances
         )
-        all_restaurants["contextual_score"] = contextual_score
 
         # === 6. Compute Final Hybrid Score ===
         # Adjust weights if user has no CF history
@@ -158,29 +297,39 @@ class HybridRecommender:
         else:
             adjusted_weights = self.weights
 
-        all_restaurants["final_score"] = (
-            adjusted_weights["collaborative_filtering"] * all_restaurants["cf_score"]
-            + adjusted_weights["content_based"] * all_restaurants["content_score"]
-            + adjusted_weights["contextual"] * all_restaurants["contextual_score"]
+        final_score = (
+            adjusted_weights["collaborative_filtering"] * cf_score
+            + adjusted_weights["content_based"] * content_score
+            + adjusted_weights["contextual"] * contextual_score
         )
 
         # === 7. Apply Business Rules & Filters ===
         # Filter out restaurants with very low ratings
-        all_restaurants = all_restaurants[all_restaurants["avg_rating"] >= 3.0]
+        keep = self._rating[rows] >= 3.0
 
         # Filter by distance if user location provided
         if user_location:
-            all_restaurants = self._filter_by_distance(
-                all_restaurants, user_location, max_distance_km=10
-            )
+            keep &= distances <= 10  # max distance in km
+        candidates = np.flatnonzero(keep)
 
         # === 8. Rank and Return Top-N ===
-        recommendations = all_restaurants.sort_values(
-            "final_score", ascending=False
-        ).head(n_recommendations)
-
-        # Add rank
-        recommendations["rank"] = range(1, len(recommendations) + 1)
+        # Partial sort, then order only the selected few
+        if n_recommendations < len(candidates):
+            top = np.argpartition(
+                -final_score[candidates], max(n_recommendations - 1, 0)
+            )[:n_recommendations]
+            candidates = candidates[top]
+        top = candidates[np.argsort(-final_score[candidates], kind="stable")]
+
+        # Only the top-N rows are materialized as a DataFrame
+        recommendations = self._restaurant_details.iloc[rows[top]].reset_index(
+            drop=True
+        )
+        recommendations.insert(0, "rank", np.arange(1, len(top) + 1))
+        recommendations["final_score"] = final_score[top]
+        recommendations["cf_score"] = cf_score[top]
+        recommendations["content_score"] = content_score[top]
+        recommendations["contextual_score"] = contextual_score[top]
 
         # Select columns to return
         result_columns = [
@@ -198,116 +347,65 @@ class HybridRecommender:
             "avg_order_value",
         ]
 
-        return recommendations[result_columns].reset_index(drop=True)
+        return recommendations[result_columns]
 
     def _compute_contextual_score(
         self,
-        restaurants: pd.DataFrame,
+        rows: np.ndarray,
         context: Optional[Dict],
         user_location: Optional[Tuple[float, float]],
+        distances: Optional[np.ndarray] = None,
     ) -> np.ndarray:
         """
-        Compute contextual relevance score
+        Compute contextual relevance score for restaurant_features rows
+        (distances, if given, must align with rows)
         """
-        scores = np.ones(len(restaurants))  # Start with neutral score
-
         if context is None:
-            return scores
+            return np.ones(len(rows))  # Neutral score
+
+        # Every factor below is applied to scores in place
 
         # === Time of Day Context ===
         time_of_day = context.get("time_of_day", "lunch")
 
-        # Cuisine preferences by time
-        time_cuisine_boost = {
-            "breakfast": {
-                "South Indian": 1.3,
-                "Cafe": 1.4,
-                "Fast Food": 1.2,
-                "Beverages": 1.3,
-            },
-            "lunch": {
-                "North Indian": 1.2,
-                "South Indian": 1.2,
-                "Biryani": 1.3,
-                "Chinese": 1.1,
-            },
-            "dinner": {
-                "North Indian": 1.3,
-                "Biryani": 1.4,
-                "Chinese": 1.2,
-                "Continental": 1.1,
-            },
-            "late_night": {"Fast Food": 1.5, "Street Food": 1.4, "Chinese": 1.2},
-        }
-
-        boost_map = time_cuisine_boost.get(time_of_day, {})
-        for cuisine, boost in boost_map.items():
-            scores[restaurants["cuisine_type"] == cuisine] *= boost
+        time_boost = self._time_boost[self._time_idx.get(time_of_day, -1)]
 
         # === Weather Context ===
         weather = context.get("weather", "clear")
-        weather_boost = {
-            "rainy": {
-                "Street Food": 0.6,  # Penalize street food in rain
-                "Fast Food": 1.3,  # Boost comfort food
-                "Chinese": 1.2,
-            },
-            "hot": {"Beverages": 1.5, "Desserts": 1.3, "South Indian": 1.1},
-        }
+        weather_boost = self._weather_boost[self._weather_idx.get(weather, -1)]
 
-        boost_map = weather_boost.get(weather, {})
-        for cuisine, boost in boost_map.items():
-            scores[restaurants["cuisine_type"] == cuisine] *= boost
+        # Combine both per cuisine, then one gather over restaurants
+        scores = (time_boost * weather_boost)[self._cuisine_codes[rows]]
 
         # === Distance Penalty (if location provided) ===
         if user_location:
-            distances = self._calculate_distances(restaurants, user_location)
-            # Exponential decay: closer is much better
-            distance_scores = np.exp(-distances / 3.0)  # 3km half-life
-            scores *= distance_scores
+            if distances is None:
+                distances = self._calculate_distances(rows, user_location)
+            # Exponential decay: closer is much better (3km half-life)
+            scratch = np.divide(distances, -3.0)
+            scores *= np.exp(scratch, out=scratch)
 
         # === Popularity Boost ===
         # Popular restaurants get slight boost
-        scores *= 1 + 0.2 * restaurants["popularity_score"].values
+        popularity_boost = self._popularity[rows] * 0.2
+        popularity_boost += 1
+        scores *= popularity_boost
 
         # Normalize to 0-1 range
-        if scores.max() > 0:
-            scores = scores / scores.max()
+        max_score = scores.max(initial=0.0)
+        if max_score > 0:
+            scores /= max_score
 
         return scores
 
     def _calculate_distances(
-        self, restaurants: pd.DataFrame, user_location: Tuple[float, float]
+        self, rows: np.ndarray, user_location: Tuple[float, float]
     ) -> np.ndarray:
         """
-        Calculate distances from user to restaurants (in km)
+        Calculate distances from user to restaurant_features rows (in km)
         """
         user_lat, user_lon = user_location
-
-        # Simplified distance calculation
-        lat_diff = (restaurants["location_lat"].values - user_lat) * 111
-        lon_diff = (
-            (restaurants["location_lon"].values - user_lon)
-            * 111
-            * np.cos(np.radians(user_lat))
-        )
-
-        distances = np.sqrt(lat_diff**2 + lon_diff**2)
-        return distances
-
-    def _filter_by_distance(
-        self,
-        restaurants: pd.DataFrame,
-        user_location: Tuple[float, float],
-        max_distance_km: float = 10,
-    ) -> pd.DataFrame:
-        """
-        Filter restaurants by maximum distance
-        """
-        distances = self._calculate_distances(restaurants, user_location)
-        restaurants["distance_km"] = distances
-
-        return restaurants[restaurants["distance_km"] <= max_distance_km]
+        return distances_km(self._lat[rows], self._lon[rows], user_lat, user_lon)
 
     def explain_recommendation(
         self, user_id: str, restaurant_id: str, context: Optional[Dict] = None
@@ -318,11 +416,12 @@ class HybridRecommender:
         """
         from explainability import ExplainabilityEngine
 
-        explainer = ExplainabilityEngine(
-            self.restaurant_features, self.user_features, self.cf_model
-        )
+        if self._explainer is None:
+            self._explainer = ExplainabilityEngine(
+                self.restaurant_features, self.user_features, self.cf_model
+            )
 
-        return explainer.explain(user_id, restaurant_id, context)
+        return self._explainer.explain(user_id, restaurant_id, context)
 
     def save_model(self, filepath: str = None):
         """
@@ -369,15 +468,14 @@ if __name__ == "__main__":
     print("=" * 80)
     print()
 
+    ensure_dirs()
+
     # Load all components
     print("📂 Loading models and data...")
 
     # Load data
-    restaurant_features = pd.read_csv(PROCESSED_DATA_DIR / "restaurant_features.csv")
-    user_features = pd.read_csv(PROCESSED_DATA_DIR / "user_features.csv")
-    interaction_matrix = pd.read_csv(
-        PROCESSED_DATA_DIR / "interaction_matrix.csv", index_col=0
-    )
+    restaurant_features = load_data_file(PROCESSED_DATA_DIR / "restaurant_features.csv")
+    user_features = load_data_file(PROCESSED_DATA_DIR / "user_features.csv")
 
     # Load models
     cf_model = CollaborativeFilteringRecommender.load_model()
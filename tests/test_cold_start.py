@@ -0,0 +1,143 @@
+"""
+Unit tests for the Cold Start Handler
+"""
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+from pathlib import Path
+from scipy.sparse import csr_matrix
+
+# Add src to path so imports work
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from cold_start_handler import ColdStartHandler
+from feature_engineering import InteractionMatrix
+
+@pytest.fixture
+def restaurant_features():
+    """Create a tiny restaurant feature table"""
+    return pd.DataFrame({
+        'restaurant_id': [f'rest_{i}' for i in range(6)],
+        'name': [f'Rest {i}' for i in range(6)],
+        'cuisine_type': ['Chinese', 'Chinese', 'Italian', 'Italian', 'Biryani', 'Biryani'],
+        'avg_rating': [4.5, 4.0, 4.2, 3.8, 4.9, 4.1],
+        'total_reviews': [100, 50, 80, 20, 300, 60],
+        'price_range': [1, 2, 2, 3, 2, 1],
+        'avg_delivery_time': [25, 30, 35, 40, 20, 45],
+        'is_veg_only': [True, False, True, False, False, True],
+        'popularity_score': [0.6, 0.4, 0.5, 0.2, 0.9, 0.3],
+        'avg_order_value': [200.0, 300.0, 350.0, 500.0, 400.0, 150.0]
+    })
+
+def test_similar_user_cold_start_uses_most_similar_users(restaurant_features):
+    """Only users above the similarity threshold contribute scores"""
+    handler = ColdStartHandler(restaurant_features)
+
+    all_users = pd.DataFrame({
+        'user_id': ['user_0', 'user_1', 'user_2'],
+        'favorite_cuisine': ['Chinese', 'Chinese', 'Italian'],
+        'dietary_preference': ['veg', 'non_veg', 'veg'],
+        'price_sensitivity': ['low', 'high', 'low']
+    })
+    interaction_matrix = InteractionMatrix(
+        csr_matrix([[1.0, 0, 0, 0, 0, 0],
+                    [0, 1.0, 0, 0, 0, 0],
+                    [0, 0, 1.0, 0, 0, 0]]),
+        all_users['user_id'].to_numpy(),
+        restaurant_features['restaurant_id'].to_numpy()
+    )
+    profile = {'favorite_cuisine': 'Chinese', 'dietary_preference': 'veg', 'price_sensitivity': 'low'}
+
+    recs = handler.similar_user_cold_start(profile, all_users, interaction_matrix)
+
+    # user_0 matches fully (1.0); user_1 (0.5) and user_2 (0.5) miss the > 0.5 threshold
+    assert recs['restaurant_id'].tolist() == ['rest_0']
+    assert recs['cold_start_score'].iloc[0] == pytest.approx(1.0)
+
+def test_similar_user_cold_start_sums_weighted_sparse_rows(restaurant_features):
+    """Scores are similarity-weighted sums over the similar users' CSR rows"""
+    handler = ColdStartHandler(restaurant_features)
+
+    all_users = pd.DataFrame({
+        'user_id': ['user_0', 'user_1', 'user_2', 'user_9'],
+        'favorite_cuisine': ['Chinese', 'Chinese', 'Italian', 'Chinese'],
+        'dietary_preference': ['veg', 'veg', 'veg', 'veg'],
+        'price_sensitivity': ['low', 'high', 'low', 'low']
+    })
+    # user_9 has a matching profile but no row in the matrix
+    interaction_matrix = InteractionMatrix(
+        csr_matrix([[2.0, 0, 1.0, 0, 0, 0],
+                    [1.0, 0, 0, 3.0, 0, 0],
+                    [0, 0, 0, 0, 5.0, 0]]),
+        np.array(['user_0', 'user_1', 'user_2']),
+        restaurant_features['restaurant_id'].to_numpy()
+    )
+    profile = {'favorite_cuisine': 'Chinese', 'dietary_preference': 'veg', 'price_sensitivity': 'low'}
+
+    recs = handler.similar_user_cold_start(profile, all_users, interaction_matrix)
+
+    assert recs['restaurant_id'].tolist() == ['rest_0', 'rest_3', 'rest_2']
+    assert recs['cold_start_score'].tolist() == pytest.approx([1.0 * 2 + 0.8 * 1, 0.8 * 3, 1.0])
+
+def test_similar_user_cold_start_takes_first_20_users_in_table_order(restaurant_features):
+    """The first 20 users above the threshold are used, not the 20 most similar"""
+    handler = ColdStartHandler(restaurant_features)
+
+    # 20 partial matches (0.8) ordering rest_0, then one exact match (1.0) ordering rest_5
+    all_users = pd.DataFrame({
+        'user_id': [f'user_{i}' for i in range(21)],
+        'favorite_cuisine': ['Chinese'] * 21,
+        'dietary_preference': ['veg'] * 21,
+        'price_sensitivity': ['high'] * 20 + ['low']
+    })
+    rows = np.zeros((21, 6))
+    rows[:20, 0] = 1.0
+    rows[20, 5] = 1.0
+    interaction_matrix = InteractionMatrix(
+        csr_matrix(rows), all_users['user_id'].to_numpy(),
+        restaurant_features['restaurant_id'].to_numpy()
+    )
+    profile = {'favorite_cuisine': 'Chinese', 'dietary_preference': 'veg', 'price_sensitivity': 'low'}
+
+    recs = handler.similar_user_cold_start(profile, all_users, interaction_matrix)
+
+    assert recs['restaurant_id'].tolist() == ['rest_0']
+    assert recs['cold_start_score'].iloc[0] == pytest.approx(20 * 0.8)
+
+def test_onboarding_recommend_caps_three_per_cuisine():
+    """Diversity rule keeps at most 3 restaurants per cuisine, then backfills"""
+    restaurants = pd.DataFrame({
+        'restaurant_id': [f'rest_{i}' for i in range(8)],
+        'name': [f'Rest {i}' for i in range(8)],
+        'cuisine_type': ['Chinese'] * 6 + ['Italian'] * 2,
+        'avg_rating': [4.0] * 8,
+        'total_reviews': [100] * 8,
+        'price_range': [1] * 8,
+        'avg_delivery_time': [30] * 8,
+        'is_veg_only': [True] * 8,
+        'popularity_score': [0.9, 0.8, 0.7, 0.6, 0.5, 0.4, 0.3, 0.2],
+        'avg_order_value': [200.0] * 8
+    })
+    handler = ColdStartHandler(restaurants)
+    prefs = {'dietary_preference': 'veg', 'favorite_cuisines': ['Chinese'], 'budget': '₹0-200'}
+
+    recs = handler.onboarding_recommend(prefs, n_recommendations=5)
+    assert recs['restaurant_id'].tolist() == ['rest_0', 'rest_1', 'rest_2', 'rest_6', 'rest_7']
+    assert recs['rank'].tolist() == [1, 2, 3, 4, 5]
+
+    # Not enough diverse candidates: fill with the remaining top-scored ones
+    recs = handler.onboarding_recommend(prefs, n_recommendations=7)
+    assert recs['restaurant_id'].tolist() == [
+        'rest_0', 'rest_1', 'rest_2', 'rest_6', 'rest_7', 'rest_3', 'rest_4'
+    ]
+
+def test_onboarding_recommend_without_matches_returns_empty_frame(restaurant_features):
+    """Filters that exclude every restaurant give an empty result, not an error"""
+    handler = ColdStartHandler(restaurant_features)
+    prefs = {'dietary_preference': 'veg', 'favorite_cuisines': ['Chinese'], 'budget': '₹600+'}
+
+    recs = handler.onboarding_recommend(prefs, n_recommendations=5)
+
+    assert recs.empty
+    assert 'cold_start_score' in recs.columns
@@ -0,0 +1,79 @@
+"""
+Unit tests for the Collaborative Filtering Recommender
+"""
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+from pathlib import Path
+from sklearn.metrics.pairwise import cosine_similarity
+
+# Add src to path so imports work
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from collaborative_filtering import CollaborativeFilteringRecommender
+
+@pytest.fixture
+def interaction_matrix():
+    """Create a small random user-restaurant interaction matrix"""
+    rng = np.random.default_rng(42)
+    values = rng.random((20, 8)) * (rng.random((20, 8)) < 0.4)
+    values[5] = 0  # user with no interactions
+    return pd.DataFrame(
+        values,
+        index=[f'user_{i}' for i in range(20)],
+        columns=[f'rest_{i}' for i in range(8)]
+    )
+
+def test_get_similar_users_matches_cosine_similarity(interaction_matrix):
+    """Similar users are the top-k by cosine similarity, best first"""
+    cf = CollaborativeFilteringRecommender(interaction_matrix)
+    cf.fit()
+
+    similar_users = cf.get_similar_users('user_0', k=5)
+
+    expected = cosine_similarity(interaction_matrix.values)[0]
+    expected[0] = -1  # exclude the user themselves
+    expected_ids = interaction_matrix.index[np.argsort(-expected, kind='stable')[:5]]
+
+    assert [uid for uid, _ in similar_users] == list(expected_ids)
+    for uid, score in similar_users:
+        assert score == pytest.approx(expected[interaction_matrix.index.get_loc(uid)])
+
+def test_get_similar_users_skips_users_without_overlap(interaction_matrix):
+    """A user with no interactions has no similar users"""
+    cf = CollaborativeFilteringRecommender(interaction_matrix)
+    cf.fit()
+
+    assert cf.get_similar_users('user_5', k=5) == []
+    assert cf.get_similar_users('unknown_user', k=5) == []
+
+def test_latent_factor_recommendations(interaction_matrix, tmp_path):
+    """Latent-factor mode scores unseen restaurants and survives a save/load round trip"""
+    cf = CollaborativeFilteringRecommender(interaction_matrix, n_factors=4)
+    cf.fit()
+    assert cf.user_factors.shape == (20, 4)
+    assert cf.item_factors.shape == (4, 8)
+
+    recs = cf.recommend('user_0', n_recommendations=3)
+    already_ordered = set(cf.get_user_order_history('user_0'))
+    assert 0 < len(recs) <= 3
+    assert not already_ordered & set(recs['restaurant_id'])
+    assert recs['cf_score'].is_monotonic_decreasing
+    assert recs['cf_score'].iloc[0] == pytest.approx(1.0)
+
+    cf.save_model(tmp_path / 'cf')
+    loaded = CollaborativeFilteringRecommender.load_model(tmp_path / 'cf')
+    pd.testing.assert_frame_equal(loaded.recommend('user_0', n_recommendations=3), recs)
+
+def test_recommend_batch_matches_single_user_calls(interaction_matrix):
+    """Batch recommendations are the same as calling recommend per user"""
+    cf = CollaborativeFilteringRecommender(interaction_matrix)
+    cf.fit()
+
+    user_ids = ['user_0', 'user_1', 'user_5', 'unknown_user']
+    batch = cf.recommend_batch(user_ids, n_recommendations=3, n_jobs=2)
+
+    assert list(batch) == user_ids
+    for user_id in user_ids:
+        pd.testing.assert_frame_equal(batch[user_id], cf.recommend(user_id, n_recommendations=3))
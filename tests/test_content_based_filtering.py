@@ -0,0 +1,137 @@
+"""
+Unit tests for the Content-Based Recommender
+"""
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+from pathlib import Path
+from sklearn.metrics.pairwise import cosine_similarity
+
+# Add src to path so imports work
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from content_based_filtering import ContentBasedRecommender
+
+@pytest.fixture
+def restaurant_features():
+    """Create a tiny restaurant feature table"""
+    return pd.DataFrame({
+        'restaurant_id': [f'rest_{i}' for i in range(4)],
+        'cuisine_type': ['Chinese', 'Italian', 'Biryani', 'Chinese'],
+        'avg_rating': [4.0, 5.0, 3.0, 4.5],
+        'price_range': [2, 4, 1, 3],
+        'avg_delivery_time': [20, 60, 40, 30],
+        'is_veg_only': [False, False, True, True],
+        'is_veg_only_int': [0, 0, 1, 1],
+        'cuisine_type_encoded': [0, 1, 2, 0],
+        'popularity_score': [0.5, 0.9, 0.1, 0.7],
+        'value_score': [1.0, 0.8, 1.2, 0.9],
+        'delivery_efficiency': [0.9, 0.4, 0.6, 0.8]
+    })
+
+@pytest.fixture
+def user_features():
+    """Create a single user profile"""
+    return pd.DataFrame({
+        'user_id': ['user_0'],
+        'favorite_cuisine': ['Chinese'],
+        'most_ordered_cuisine': ['Italian'],
+        'dietary_preference': ['non_veg'],
+        'price_preference_score': [2.0]
+    })
+
+def test_recommend_scores_match_weighted_formula(restaurant_features, user_features):
+    """Content score = 0.40/0.30 cuisine + 0.25 price + 0.20 rating + 0.15 delivery"""
+    cb = ContentBasedRecommender(restaurant_features, user_features)
+    cb.fit()
+
+    recs = cb.recommend('user_0', n_recommendations=4)
+
+    raw = {
+        'rest_0': 0.40 + 0.25 * 1.0 + 0.20 * 0.8 + 0.15 * 1.0,
+        'rest_1': 0.30 + 0.25 * (1 - 2 / 3) + 0.20 * 1.0 + 0.15 * 0.0,
+        'rest_2': 0.0 + 0.25 * (1 - 1 / 3) + 0.20 * 0.6 + 0.15 * 0.5,
+        'rest_3': 0.40 + 0.25 * (1 - 1 / 3) + 0.20 * 0.9 + 0.15 * 0.75,
+    }
+    expected = sorted(raw, key=raw.get, reverse=True)
+    top = max(raw.values())
+
+    assert recs['restaurant_id'].tolist() == expected
+    for rid, score in zip(recs['restaurant_id'], recs['content_score']):
+        assert score == pytest.approx(raw[rid] / top)
+
+def test_recommend_excludes_order_history(restaurant_features, user_features):
+    """Restaurants the user already ordered from are not recommended"""
+    cb = ContentBasedRecommender(restaurant_features, user_features)
+    cb.fit()
+
+    recs = cb.recommend('user_0', n_recommendations=4, user_order_history=['rest_0'])
+
+    assert 'rest_0' not in recs['restaurant_id'].tolist()
+    assert len(recs) == 3
+
+def test_find_similar_restaurants_matches_cosine_similarity(restaurant_features, user_features):
+    """Similar restaurants are ranked by cosine similarity of the scaled vectors"""
+    cb = ContentBasedRecommender(restaurant_features, user_features)
+    cb.fit()
+
+    similar = cb.find_similar_restaurants('rest_0', k=2)
+
+    expected = cosine_similarity(cb.restaurant_vectors.astype(np.float64))[0]
+    expected_ids = [f'rest_{i}' for i in np.argsort(-expected[1:], kind='stable')[:2] + 1]
+
+    assert [rid for rid, _ in similar] == expected_ids
+    for rid, score in similar:
+        assert score == pytest.approx(expected[int(rid.split('_')[1])], abs=1e-5)
+    assert cb.find_similar_restaurants('unknown', k=2) == []
+
+def test_find_similar_for_all_matches_single_queries(restaurant_features, user_features):
+    """The batched neighbour table agrees with per-restaurant queries"""
+    cb = ContentBasedRecommender(restaurant_features, user_features)
+    cb.fit()
+
+    neighbours = cb.find_similar_for_all(k=2)
+
+    assert list(neighbours) == restaurant_features['restaurant_id'].tolist()
+    for rid, similar in neighbours.items():
+        single = cb.find_similar_restaurants(rid, k=2)
+        assert [r for r, _ in similar] == [r for r, _ in single]
+        assert [s for _, s in similar] == pytest.approx([s for _, s in single], abs=1e-6)
+
+def test_unknown_user_gets_most_popular_restaurants(restaurant_features, user_features):
+    """Cold-start users get the top restaurants by popularity, then rating"""
+    cb = ContentBasedRecommender(restaurant_features, user_features)
+    cb.fit()
+
+    recs = cb.recommend('new_user', n_recommendations=2)
+
+    assert recs['restaurant_id'].tolist() == ['rest_1', 'rest_3']
+    assert recs['content_score'].tolist() == [1.0, 0.5]
+
+def test_recommend_many_matches_recommend(restaurant_features, user_features):
+    """Batched scoring gives the same ranking and scores as per-user calls"""
+    cb = ContentBasedRecommender(restaurant_features, user_features)
+    cb.fit()
+
+    histories = {'user_0': ['rest_3']}
+    batch = cb.recommend_many(['user_0', 'new_user'], n_recommendations=3,
+                              user_order_histories=histories)
+
+    assert list(batch) == ['user_0', 'new_user']
+    expected = cb.recommend('user_0', n_recommendations=3, user_order_history=['rest_3'])
+    assert batch['user_0']['restaurant_id'].tolist() == expected['restaurant_id'].tolist()
+    assert batch['user_0']['content_score'].tolist() == pytest.approx(expected['content_score'].tolist())
+    pd.testing.assert_frame_equal(batch['new_user'], cb.recommend('new_user', n_recommendations=3))
+
+def test_save_and_load_round_trip(restaurant_features, user_features, tmp_path):
+    """A saved model loads back with the same vectors and recommendations"""
+    cb = ContentBasedRecommender(restaurant_features, user_features)
+    cb.fit()
+    cb.save_model(tmp_path / 'cb')
+
+    loaded = ContentBasedRecommender.load_model(tmp_path / 'cb', restaurant_features, user_features)
+
+    np.testing.assert_array_equal(loaded.restaurant_vectors, cb.restaurant_vectors)
+    assert loaded.find_similar_restaurants('rest_0', k=2) == cb.find_similar_restaurants('rest_0', k=2)
+    pd.testing.assert_frame_equal(loaded.recommend('user_0'), cb.recommend('user_0'))
@@ -0,0 +1,90 @@
+"""
+Unit tests for the Recommendation Evaluator
+"""
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+from pathlib import Path
+
+# Add src to path so imports work
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from evaluation import RecommendationEvaluator
+
+RECOMMENDATIONS = {
+    'user_0': ['rest_0', 'rest_1', 'rest_2', 'rest_3', 'rest_4', 'rest_5'],
+    'user_1': ['rest_5', 'rest_4', 'rest_3', 'rest_2', 'rest_1', 'rest_0'],
+    'user_2': ['rest_6', 'rest_7', 'rest_8'],
+}
+HISTORY = {'user_0': ['rest_0'], 'user_1': [], 'user_2': ['rest_6', 'rest_7']}
+
+class FakeCF:
+    def get_user_order_history(self, user_id):
+        return HISTORY.get(user_id, [])
+
+class FakeRecommender:
+    """Serves fixed recommendation lists"""
+    cf_model = FakeCF()
+
+    def recommend(self, user_id, n_recommendations=10, exclude_ordered=True):
+        return pd.DataFrame({'restaurant_id': RECOMMENDATIONS[user_id][:n_recommendations]})
+
+@pytest.fixture
+def evaluator():
+    """Evaluator over a tiny catalog and test set"""
+    restaurant_features = pd.DataFrame({
+        'restaurant_id': [f'rest_{i}' for i in range(9)],
+        'cuisine_type': ['Chinese', 'Chinese', 'Italian', 'Biryani', 'Italian',
+                         'Cafe', 'Cafe', 'Chinese', 'Desserts'],
+    })
+    test_orders = pd.DataFrame({
+        'user_id': ['user_0', 'user_0', 'user_0', 'user_1', 'user_2', 'user_3'],
+        'restaurant_id': ['rest_1', 'rest_4', 'rest_1', 'rest_0', 'rest_8', 'rest_2'],
+    })
+    return RecommendationEvaluator(test_orders, restaurant_features)
+
+def test_evaluate_model_matches_per_user_metrics(evaluator):
+    """Aggregated metrics equal the mean of the per-user metric helpers"""
+    k_values = [2, 3, 5]
+    results = evaluator.evaluate_model(
+        FakeRecommender(), ['user_0', 'user_1', 'user_2', 'user_9'], k_values=k_values
+    )
+
+    actuals = {'user_0': ['rest_1', 'rest_4'], 'user_1': ['rest_0'], 'user_2': ['rest_8']}
+    for k in k_values:
+        for name, metric in [('precision@k', evaluator.precision_at_k),
+                             ('recall@k', evaluator.recall_at_k),
+                             ('hit_rate@k', evaluator.hit_rate_at_k),
+                             ('ndcg@k', evaluator.ndcg_at_k)]:
+            expected = np.mean([metric(RECOMMENDATIONS[u][:5], actual, k)
+                                for u, actual in actuals.items()])
+            assert results[name][k] == pytest.approx(expected)
+
+    assert results['ndcg@k'][2] == pytest.approx((1 / np.log2(3)) / (1 + 1 / np.log2(3)) / 3)
+    assert results['diversity'] == pytest.approx(np.mean([3 / 5, 4 / 5, 3 / 3]))
+    assert results['novelty'] == pytest.approx(np.mean([4 / 5, 1.0, 1 / 3]))
+    assert results['coverage'] == pytest.approx(9 / 9)
+
+class FakeBatchRecommender(FakeRecommender):
+    """Serves the same lists through recommend_batch"""
+    def __init__(self):
+        self.batched_users = None
+
+    def recommend(self, user_id, n_recommendations=10, exclude_ordered=True):
+        raise AssertionError('recommend should not be called when batching')
+
+    def recommend_batch(self, user_ids, n_recommendations=10, exclude_ordered=True):
+        self.batched_users = list(user_ids)
+        return {u: FakeRecommender.recommend(self, u, n_recommendations) for u in user_ids}
+
+def test_evaluate_model_uses_recommend_batch(evaluator):
+    """Batch-capable recommenders are called once, only for users with test orders"""
+    users = ['user_0', 'user_1', 'user_2', 'user_9']
+    recommender = FakeBatchRecommender()
+
+    batched = evaluator.evaluate_model(recommender, users, k_values=[2, 5])
+    single = evaluator.evaluate_model(FakeRecommender(), users, k_values=[2, 5])
+
+    assert recommender.batched_users == ['user_0', 'user_1', 'user_2']
+    assert batched == single
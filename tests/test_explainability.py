@@ -0,0 +1,108 @@
+"""
+Unit tests for the Explainability Engine
+"""
+import pytest
+import pandas as pd
+import numpy as np
+import sys
+from pathlib import Path
+from scipy.sparse import csr_matrix
+
+# Add src to path so imports work
+sys.path.append(str(Path(__file__).parent.parent / 'src'))
+
+from explainability import ExplainabilityEngine
+
+HISTORY = {
+    'user_0': ['rest_0', 'rest_1'],
+    'user_1': ['rest_2'], 'user_2': ['rest_2'], 'user_3': ['rest_2', 'rest_3'],
+}
+
+class FakeCF:
+    """Order histories and fixed similar users"""
+    user_ids = np.array(list(HISTORY), dtype=object)
+    user_id_to_idx = {uid: i for i, uid in enumerate(HISTORY)}
+    restaurant_ids = np.array([f'rest_{i}' for i in range(4)], dtype=object)
+    sparse_interaction_matrix = csr_matrix(
+        [[1.0 if f'rest_{i}' in orders else 0.0 for i in range(4)] for orders in HISTORY.values()]
+    )
+
+    def get_user_order_history(self, user_id):
+        return HISTORY.get(user_id, [])
+
+    def get_similar_users(self, user_id, k=10):
+        return [(uid, 0.9) for uid in HISTORY if uid != user_id][:k]
+
+@pytest.fixture
+def restaurant_features():
+    """A tiny restaurant table"""
+    return pd.DataFrame({
+        'restaurant_id': [f'rest_{i}' for i in range(4)],
+        'name': [f'Rest {i}' for i in range(4)],
+        'cuisine_type': ['Chinese', 'Chinese', 'Biryani', 'Italian'],
+        'avg_rating': [4.5, 3.5, 4.2, 3.0],
+        'total_reviews': [120, 40, 300, 10],
+        'avg_delivery_time': [25, 45, 35, 50],
+        'value_score': [1.0, 1.3, 0.8, 0.5],
+        'avg_order_value': [300.0, 180.0, 450.0, 600.0],
+        'popularity_score': [0.8, 0.2, 0.9, 0.1],
+    })
+
+@pytest.fixture
+def user_features():
+    """Profiles for the users in HISTORY"""
+    return pd.DataFrame({
+        'user_id': ['user_0', 'user_1', 'user_2', 'user_3'],
+        'favorite_cuisine': ['Chinese', 'Biryani', 'Biryani', 'Italian'],
+    })
+
+@pytest.fixture
+def explainer(restaurant_features, user_features):
+    """Explainer over a tiny restaurant and user table"""
+    return ExplainabilityEngine(restaurant_features, user_features, FakeCF())
+
+def test_explain_collects_reasons_by_weight(explainer):
+    """History, collaborative and quality reasons are found and ordered high to low"""
+    explanation = explainer.explain('user_0', 'rest_2', {'time_of_day': 'lunch'})
+
+    assert explanation['restaurant_name'] == 'Rest 2'
+    assert [r['type'] for r in explanation['all_reasons']] == [
+        'collaborative', 'quality', 'contextual', 'trending'
+    ]
+    assert explanation['primary_reason'] == (
+        'Popular among users with similar taste (3 similar users love this)'
+    )
+
+    explanation = explainer.explain('user_0', 'rest_0')
+    assert [r['type'] for r in explanation['all_reasons']] == [
+        'user_history', 'quality', 'proximity', 'trending'
+    ]
+
+def test_explain_unknown_user_uses_restaurant_reasons_only(explainer):
+    """A user without a profile still gets restaurant-based reasons"""
+    explanation = explainer.explain('new_user', 'rest_1')
+
+    assert [r['type'] for r in explanation['all_reasons']] == ['value']
+    assert explanation['explanation_text'] == 'Great value for money (₹180 with 3.5★ rating)'
+
+def test_batch_explain_matches_single_explanations(explainer):
+    """Batch explanations equal explaining each recommendation on its own"""
+    recommendations = pd.DataFrame({'restaurant_id': ['rest_2', 'rest_0', 'rest_3']})
+    context = {'time_of_day': 'dinner'}
+
+    batch = explainer.batch_explain('user_0', recommendations, context)
+
+    assert batch == [explainer.explain('user_0', rid, context)
+                     for rid in recommendations['restaurant_id']]
+
+def test_reason_text_rounds_float32_features(restaurant_features, user_features):
+    """Downcast float32 ratings read back as one decimal in the reason text"""
+    features = restaurant_features.astype({'avg_rating': np.float32, 'total_reviews': np.int16,
+                                           'avg_order_value': np.float32})
+    explainer = ExplainabilityEngine(features, user_features, FakeCF())
+
+    reasons = [r['text'] for r in explainer.explain('user_0', 'rest_2')['all_reasons']]
+    assert 'Rated 4.2/5 by 300 customers' in reasons
+
+    explanation = explainer.explain('new_user', 'rest_1')
+    assert explanation['explanation_text'] == 'Great value for money (₹180 with 3.5★ rating)'
@@ -7,116 +7,186 @@ import numpy as np
 import sys
 import os
 from pathlib import Path
+from scipy import sparse
 
 # Add src to path so imports work
 sys.path.append(str(Path(__file__).parent.parent / 'src'))
 
-from data_generator import RestaurantDataGenerator
 from feature_engineering import FeatureEngineer
 from collaborative_filtering import CollaborativeFilteringRecommender
 from content_based_filtering import ContentBasedRecommender
 from hybrid_recommender import HybridRecommender
 
-@pytest.fixture
+@pytest.fixture(scope='module')
 def sample_data():
-    """Create a tiny dataset for testing purposes"""
-    # Create generator
-    gen = RestaurantDataGenerator()
+    """Create a tiny dataset for testing purposes (shared, read-only)"""
+    # Seeded generator, so the random columns are the same on every run
+    rng = np.random.default_rng(0)
+    ids = np.arange(10).astype(str)
 
     # Create dummy users
     users = pd.DataFrame({
-        'user_id': [f'user_{i}' for i in range(10)],
-        'total_orders': np.random.randint(1, 10, 10),
-        'avg_order_value': np.random.uniform(100, 500, 10),
-        'favorite_cuisine': ['North Indian'] * 10,
-        'price_sensitivity': ['medium'] * 10,
-        'avg_rating_given': [4.5] * 10,
-        'dietary_preference': ['veg'] * 10,
-        'preferred_meal_time': ['dinner'] * 10,
-        'location_lat': [28.5] * 10,
-        'location_lon': [77.1] * 10,
-        'days_since_last_order': [5] * 10
-    })
+        'user_id': np.char.add('user_', ids),
+        'total_orders': rng.integers(1, 10, 10, dtype=np.int16),
+        'avg_order_value': rng.uniform(100, 500, 10).astype(np.float32),
+        'favorite_cuisine': pd.Categorical(['North Indian'] * 10),
+        'price_sensitivity': pd.Categorical(['medium'] * 10),
+        'avg_rating_given': np.full(10, 4.5, dtype=np.float32),
+        'dietary_preference': pd.Categorical(['veg'] * 10),
+        'preferred_meal_time': pd.Categorical(['dinner'] * 10),
+        'location_lat': np.full(10, 28.5, dtype=np.float32),
+        'location_lon': np.full(10, 77.1, dtype=np.float32),
+        'days_since_last_order': np.full(10, 5, dtype=np.int16)
+    }, copy=False)
     
     restaurants = pd.DataFrame({
-        'restaurant_id': [f'rest_{i}' for i in range(10)],
-        'name': [f'Rest {i}' for i in range(10)],
-        'cuisine_type': ['North Indian'] * 5 + ['Chinese'] * 5,
-        'avg_rating': [4.2] * 10,
-        'total_reviews': [100] * 10,
-        'price_range': [2] * 10,
-        'avg_delivery_time': [30] * 10,
-        'is_veg_only': [True] * 10,
-        'location_lat': [28.5] * 10,
-        'location_lon': [77.1] * 10,
-        'operating_hours': ['10AM-10PM'] * 10,
-        'commission_rate': [0.2] * 10,
-        'popularity_score': [0.8] * 10,
-        'value_score': [1.0] * 10,
-        'retention_rate': [0.5] * 10,
-        'delivery_efficiency': [0.9] * 10
-    })
+        'restaurant_id': np.char.add('rest_', ids),
+        'name': np.char.add('Rest ', ids),
+        'cuisine_type': pd.Categorical(['North Indian'] * 5 + ['Chinese'] * 5),
+        'avg_rating': np.full(10, 4.2, dtype=np.float32),
+        'total_reviews': np.full(10, 100, dtype=np.int16),
+        'price_range': np.full(10, 2, dtype=np.int8),
+        'avg_delivery_time': np.full(10, 30, dtype=np.int16),
+        'is_veg_only': np.ones(10, dtype=bool),
+        'location_lat': np.full(10, 28.5, dtype=np.float32),
+        'location_lon': np.full(10, 77.1, dtype=np.float32),
+        'operating_hours': pd.Categorical(['10AM-10PM'] * 10),
+        'commission_rate': np.full(10, 0.2, dtype=np.float32),
+        'popularity_score': np.full(10, 0.8, dtype=np.float32),
+        'value_score': np.full(10, 1.0, dtype=np.float32),
+        'retention_rate': np.full(10, 0.5, dtype=np.float32),
+        'delivery_efficiency': np.full(10, 0.9, dtype=np.float32)
+    }, copy=False)
     
     # Create dummy orders
     orders = pd.DataFrame({
-        'order_id': range(20),
-        'user_id': ['user_0', 'user_1'] * 10,
-        'restaurant_id': ['rest_0', 'rest_1'] * 10,
-        'order_value': [200.0] * 20,
-        'order_timestamp': pd.to_datetime('2025-01-01'),
-        'delivery_time': [30] * 20,
-        'user_rating': [5.0] * 20,
-        'cuisine_type': ['North Indian'] * 20
-    })
+        'order_id': np.arange(20, dtype=np.int32),
+        'user_id': np.tile(np.array(['user_0', 'user_1']), 10),
+        'restaurant_id': np.tile(np.array(['rest_0', 'rest_1']), 10),
+        'order_value': np.full(20, 200.0, dtype=np.float32),
+        'order_timestamp': np.full(20, np.datetime64('2025-01-01', 'ns')),
+        'delivery_time': np.full(20, 30, dtype=np.int16),
+        'user_rating': np.full(20, 5.0, dtype=np.float32),
+        'cuisine_type': pd.Categorical(['North Indian'] * 20)
+    }, copy=False)
     
     return users, restaurants, orders
 
-def test_feature_engineering_pipeline(sample_data):
-    """Test that feature engineer runs without errors"""
+@pytest.fixture(scope='module')
+def engineered(sample_data):
+    """Run the feature engineering pipeline once for the module"""
     users, restaurants, orders = sample_data
     engineer = FeatureEngineer(users, restaurants, orders)
-    
+
     user_feat = engineer.create_user_features()
+    rest_feat = engineer.create_restaurant_features()
+    interaction = engineer.create_user_restaurant_matrix()
+    return user_feat, rest_feat, interaction
+
+def test_feature_engineering_pipeline(engineered):
+    """Test that feature engineer runs without errors"""
+    user_feat, rest_feat, interaction = engineered
+
     assert not user_feat.empty
     assert 'price_preference_score' in user_feat.columns
     
-    rest_feat = engineer.create_restaurant_features()
     assert not rest_feat.empty
     assert 'popularity_score' in rest_feat.columns
+    assert rest_feat['popularity_score'].dtype == np.float32
+    assert rest_feat['total_orders'].dtype == np.int16
+    assert user_feat['order_count'].dtype == np.int16
     
-    interaction = engineer.create_user_restaurant_matrix()
-    assert not interaction.empty
-    assert interaction.shape == (2, 2) # based on dummy data users 0,1 and rest 0,1
+    assert sparse.issparse(interaction.matrix)
+    assert interaction.matrix.nnz == 2
+    assert interaction.matrix.shape == (2, 2) # based on dummy data users 0,1 and rest 0,1
+    assert interaction.user_ids.tolist() == ['user_0', 'user_1']
+
+def test_user_features_order_stats(sample_data):
+    """Per-user order aggregates, most ordered cuisine (ties by name) and diversity"""
+    users, restaurants, _ = sample_data
+    orders = pd.DataFrame({
+        'order_id': range(6),
+        'user_id': ['user_0'] * 5 + ['user_1'],
+        'restaurant_id': ['rest_5', 'rest_0', 'rest_6', 'rest_1', 'rest_0', 'rest_2'],
+        'order_value': [100.0, 200.0, 300.0, 400.0, 500.0, 250.0],
+        'order_timestamp': pd.to_datetime(['2025-01-03', '2025-01-01', '2025-01-02',
+                                           '2025-01-05', '2025-01-04', '2025-01-02']),
+        'delivery_time': [30, 40, 20, 30, 30, 25],
+        'user_rating': [5.0, 4.0, 3.0, 4.0, 4.0, 2.0],
+        'cuisine_type': ['Chinese', 'North Indian', 'Chinese', 'North Indian', 'Biryani',
+                         'North Indian']
+    })
+    engineer = FeatureEngineer(users, restaurants, orders)
+
+    user_feat = engineer.create_user_features(
+        reference_time=pd.Timestamp('2025-01-11 12:00')
+    ).set_index('user_id')
+
+    user_0 = user_feat.loc['user_0']
+    assert user_0['order_count'] == 5
+    assert user_0['total_spent'] == 1500.0
+    assert user_0['unique_restaurants'] == 4
+    assert user_0['most_ordered_cuisine'] == 'Chinese'
+    assert user_0['cuisine_diversity'] == pytest.approx(3 / 5)
+    assert user_0['days_since_first_order'] == 10
+    assert user_feat.loc['user_1', 'most_ordered_cuisine'] == 'North Indian'
+    assert user_feat.loc['user_1', 'cuisine_diversity'] == 1.0
+
+    # Users without orders get zero counts and no order statistics
+    assert user_feat.loc['user_5', 'order_count'] == 0
+    assert user_feat.loc['user_5', 'cuisine_diversity'] == 0
+    assert pd.isna(user_feat.loc['user_5', 'most_ordered_cuisine'])
 
-def test_full_recommender_flow(sample_data):
-    """Integration test for the Hybrid Recommender"""
+def test_falsy_reference_time_is_not_replaced_by_now(sample_data):
+    """A reference time that is falsy (the epoch) is used as given"""
     users, restaurants, orders = sample_data
     engineer = FeatureEngineer(users, restaurants, orders)
-    
-    # 1. Engineer features
-    user_feat = engineer.create_user_features()
-    rest_feat = engineer.create_restaurant_features()
-    interaction = engineer.create_user_restaurant_matrix()
-    
-    # 2. Train CF Model
-    cf = CollaborativeFilteringRecommender(interaction)
+
+    user_feat = engineer.create_user_features(
+        reference_time=np.datetime64(0, 's')
+    ).set_index('user_id')
+
+    expected = (pd.Timestamp(0) - pd.Timestamp('2025-01-01')).days
+    assert user_feat.loc['user_0', 'days_since_first_order'] == expected
+
+@pytest.fixture(scope='module')
+def cf_model(engineered):
+    """Collaborative filtering model fitted once for the module"""
+    _, _, interaction = engineered
+    cf = CollaborativeFilteringRecommender.from_sparse(*interaction)
     cf.fit()
-    assert cf.fitted is True
-    
-    # 3. Train CB Model
+    return cf
+
+@pytest.fixture(scope='module')
+def cb_model(engineered):
+    """Content-based model fitted once for the module"""
+    user_feat, rest_feat, _ = engineered
     cb = ContentBasedRecommender(rest_feat, user_feat)
     cb.fit()
-    assert cb.fitted is True
-    
-    # 4. Hybrid Recommend
-    hybrid = HybridRecommender(cf, cb, rest_feat, user_feat)
-    
-    # Get recs for user_0
-    recs = hybrid.recommend('user_0', n_recommendations=5)
-    
-    # Should return dataframe with specific columns
+    return cb
+
+@pytest.fixture(scope='module')
+def hybrid_model(cf_model, cb_model, engineered):
+    """Hybrid recommender over the fitted CF and CB models"""
+    user_feat, rest_feat, _ = engineered
+    return HybridRecommender(cf_model, cb_model, rest_feat, user_feat)
+
+def test_cf_fits(cf_model):
+    """CF model trains on the engineered interaction matrix"""
+    assert cf_model.fitted is True
+
+def test_cb_fits(cb_model):
+    """CB model trains and keeps its vectors row-major"""
+    assert cb_model.fitted is True
+    assert cb_model.restaurant_vectors.flags.c_contiguous
+
+def test_hybrid_returns_dataframe(hybrid_model):
+    """Hybrid recommendations come back as a DataFrame"""
+    recs = hybrid_model.recommend('user_0', n_recommendations=5)
     assert isinstance(recs, pd.DataFrame)
+
+def test_hybrid_columns_present(hybrid_model):
+    """Hybrid recommendations carry the restaurant id and final score"""
+    recs = hybrid_model.recommend('user_0', n_recommendations=5)
     assert 'restaurant_id' in recs.columns
     assert 'final_score' in recs.columns
-    
-    pass
\ No newline at end of file